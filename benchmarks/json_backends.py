@@ -0,0 +1,78 @@
+"""
+Compare the JSON_BACKEND implementations.
+
+Encodes (and decodes) a typical polling payload - a list of objects
+containing datetimes, UUIDs and Decimals - using each backend that is
+installed, and prints the time per operation.
+
+Usage:
+
+    python benchmarks/json_backends.py [--objects 1000] [--number 100]
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import timeit
+import uuid
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+from django.core.exceptions import ImproperlyConfigured  # noqa: E402
+
+from zapier.triggers.encoding import OrjsonBackend, StdlibJSONBackend  # noqa: E402
+
+BACKENDS = [StdlibJSONBackend, OrjsonBackend]
+
+
+def payload(count: int) -> list[dict]:
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    return [
+        {
+            "id": i,
+            "uuid": uuid.uuid4(),
+            "title": f"Book number {i}",
+            "author": "Herman Melville",
+            "price": decimal.Decimal("9.99"),
+            "published_at": now - datetime.timedelta(days=i),
+            "tags": ["fiction", "classic", "sea"],
+            "in_stock": bool(i % 2),
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+    data = payload(args.objects)
+    print(f"Payload: {args.objects} objects, {args.number} iterations")  # noqa: T201
+    print(f"{'backend':<20}{'size':>10}{'dumps (ms)':>14}{'loads (ms)':>14}")  # noqa: T201
+    for backend_class in BACKENDS:
+        try:
+            backend = backend_class()
+        except ImproperlyConfigured:
+            print(f"{backend_class.__name__:<20}  (not installed)")  # noqa: T201
+            continue
+        encoded = backend.dumps(data)
+        dumps = timeit.timeit(lambda: backend.dumps(data), number=args.number)
+        loads = timeit.timeit(lambda: backend.loads(encoded), number=args.number)
+        print(  # noqa: T201
+            f"{backend_class.__name__:<20}{len(encoded):>10}"
+            f"{dumps / args.number * 1000:>14.3f}{loads / args.number * 1000:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compare the query plans of the hot lookups before and after the indexes.
+
+Creates a test database, migrates it to the state before the indexes
+were added (0008), seeds it with subscriptions and events, and prints
+the plan and time of each lookup - then applies the index migration
+(0009) and prints them again. The rows are created and queried using
+the historical models at each migration, so the script does not depend
+on the current schema.
+
+Usage:
+
+    python benchmarks/query_plans.py [--subscriptions 100000] [--events 2000000]
+
+Set DJANGO_SETTINGS_MODULE to run against another database (e.g. Postgres)
+- the default is the tests settings (an in-memory SQLite database).
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import timeit
+import uuid
+from typing import Callable
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.migrations.loader import MigrationLoader  # noqa: E402
+from django.db.models import Model, QuerySet  # noqa: E402
+from django.utils.timezone import now as tz_now  # noqa: E402
+
+APP = "zapier_triggers"
+BEFORE, AFTER = "0008_triggercursor", "0009_indexes"
+TRIGGERS = [f"trigger_{i}" for i in range(20)]
+BATCH_SIZE = 10000
+
+
+def get_models(migration: str) -> tuple[type[Model], type[Model]]:
+    """Return the TriggerSubscription and TriggerEvent models at a migration."""
+    state = MigrationLoader(connection).project_state((APP, migration))
+    return (
+        state.apps.get_model(APP, "TriggerSubscription"),
+        state.apps.get_model(APP, "TriggerEvent"),
+    )
+
+
+def seed(subscriptions: int, events: int) -> tuple[int, uuid.UUID, uuid.UUID]:
+    """Create the users, subscriptions and events, returning lookup values."""
+    TriggerSubscription, TriggerEvent = get_models(BEFORE)  # noqa: N806
+    User = get_user_model()  # noqa: N806
+    User.objects.bulk_create(
+        [User(username=f"user_{i}") for i in range(max(subscriptions // 10, 1))]
+    )
+    user_ids = list(User.objects.values_list("id", flat=True))
+    TriggerSubscription.objects.bulk_create(
+        (
+            TriggerSubscription(
+                user_id=random.choice(user_ids),  # noqa: S311
+                trigger=random.choice(TRIGGERS),  # noqa: S311
+                zap=f"subscription:{i}",
+                target_url=f"https://hooks.zapier.com/{i}",
+                # most subscriptions are inactive
+                unsubscribed_at=None if i % 10 == 0 else tz_now(),
+            )
+            for i in range(subscriptions)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    now = tz_now()
+    for start in range(0, events, BATCH_SIZE):
+        TriggerEvent.objects.bulk_create(
+            [
+                TriggerEvent(
+                    user_id=random.choice(user_ids),  # noqa: S311
+                    trigger=random.choice(TRIGGERS),  # noqa: S311
+                    http_method="GET",
+                    event_data=None,
+                    started_at=now,
+                    status_code=200,
+                )
+                for _ in range(min(BATCH_SIZE, events - start))
+            ]
+        )
+    subscription = TriggerSubscription.objects.order_by("?").first()
+    event = TriggerEvent.objects.order_by("-id").first()
+    assert subscription and event  # noqa: S101
+    return user_ids[0], subscription.uuid, event.uuid
+
+
+def lookups(
+    migration: str, user_id: int, subscription_uuid: uuid.UUID, event_uuid: uuid.UUID
+) -> dict[str, Callable[[], QuerySet]]:
+    TriggerSubscription, TriggerEvent = get_models(migration)  # noqa: N806
+    return {
+        "unsubscribe (subscription uuid)": lambda: TriggerSubscription.objects.filter(
+            uuid=subscription_uuid
+        ),
+        "fan-out (active subscriptions)": lambda: TriggerSubscription.objects.filter(
+            trigger=TRIGGERS[0],
+            subscribed_at__isnull=False,
+            unsubscribed_at__isnull=True,
+            paused_at__isnull=True,
+        ),
+        "polling history (user, trigger)": lambda: TriggerEvent.objects.filter(
+            user_id=user_id, trigger=TRIGGERS[0]
+        ).order_by("-started_at")[:10],
+        "event (uuid)": lambda: TriggerEvent.objects.filter(uuid=event_uuid),
+    }
+
+
+def report(title: str, queries: dict[str, Callable[[], QuerySet]]) -> None:
+    print(f"\n=== {title} ===")  # noqa: T201
+    for name, query in queries.items():
+        duration = timeit.timeit(lambda: list(query()), number=10) / 10
+        print(f"\n{name}: {duration * 1000:.3f}ms")  # noqa: T201
+        print(query().explain())  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subscriptions", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=2000000)
+    args = parser.parse_args()
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        call_command("migrate", APP, BEFORE, verbosity=0)
+        print(  # noqa: T201
+            f"Seeding {args.subscriptions} subscriptions, {args.events} events..."
+        )
+        values = seed(args.subscriptions, args.events)
+        report(f"before ({BEFORE})", lookups(BEFORE, *values))
+        call_command("migrate", APP, AFTER, verbosity=0)
+        report(f"after ({AFTER})", lookups(AFTER, *values))
+    finally:
+        connection.creation.destroy_test_db(connection.settings_dict["NAME"], 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,7 @@ from django.contrib import admin
 from django.http import HttpRequest
 
 from demo.models import Book, BookQuerySet, Film
-from zapier.triggers.event import push
-from zapier.triggers.models import TriggerSubscription
+from zapier.triggers.event import push_trigger
 
 logger = logging.getLogger(__name__)
 
@@ -19,19 +18,16 @@ class BookAdmin(admin.ModelAdmin):
 
     @admin.action(description='Push a "new book" notification to subscribers')
     def fire_webhook(self, request: HttpRequest, queryset: BookQuerySet) -> None:
-        subscriptions = TriggerSubscription.objects.active().filter(trigger="new_book")
-        subs_count = subscriptions.count()
-        if not subs_count:
+        # the books are only serialized if there are subscribers
+        result = push_trigger(
+            "new_book", lambda: [b.serialize() for b in queryset], batched=True
+        )
+        if result is None:
             self.message_user(request, "No subscribers found.", "warning")
             return
-        books: list[dict] = [b.serialize() for b in queryset]
-        books_count = len(books)
-        for s in subscriptions:
-            for b in books:
-                push(s, b)
         self.message_user(
             request,
-            f"Sent {books_count} new books to {subs_count} subscribers.",
+            f"Sent {queryset.count()} new books in {len(result.events)} requests.",
             "success",
         )
 
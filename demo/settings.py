@@ -91,6 +91,6 @@ ZAPIER_TRIGGERS = {
     # map of available triggers to list functions
     "TRIGGERS": {
         "new_book": "demo.views.new_book",
-        "new_film": "demo.views.new_film",
+        "new_film": {"func": "demo.views.new_film", "cursor": "id"},
     },
 }
@@ -28,6 +28,9 @@ def new_book(request: Request) -> TriggerData:
 
 
 def new_film(request: Request) -> TriggerData:
-    """Return real data for new_film trigger."""
+    """Return real data for new_film trigger - only films added since last poll."""
     films = Film.objects.all().order_by("-id")
-    return [film.serialize() for film in films]
+    if request.trigger_cursor:
+        films = films.filter(id__gt=request.trigger_cursor)
+    # trigger_limit is set for sample requests, so we only fetch what we need
+    return [film.serialize() for film in films[: request.trigger_limit]]
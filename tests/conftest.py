@@ -6,11 +6,26 @@ import pytest
 from django.conf import settings
 from rest_framework.authtoken.models import Token
 
+from zapier.triggers.cache import get_cache, local_cache
+from zapier.triggers.circuit import reset_circuit_breakers
 from zapier.triggers.models import TriggerSubscription
 
 from .factories import UserFactory
 
 
+@pytest.fixture(autouse=True)
+def circuit_breakers() -> None:
+    # circuit breakers are process-wide, so must not leak between tests
+    reset_circuit_breakers()
+
+
+@pytest.fixture(autouse=True)
+def trigger_cache() -> None:
+    # cached trigger data (and subscriptions) must not leak between tests
+    get_cache().clear()
+    local_cache.clear()
+
+
 @pytest.fixture
 def uf() -> UserFactory:
     return UserFactory
@@ -28,7 +43,7 @@ def active_token(user: settings.AUTH_USER_MODEL) -> Token:
 
 @pytest.fixture
 def zap() -> str:
-    return f"subscription:{random.randint(10000000,19999999)}"  # noqa: S311
+    return f"subscription:{random.randint(10000000, 19999999)}"  # noqa: S311
 
 
 @pytest.fixture
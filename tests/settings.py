@@ -86,6 +86,25 @@ def empty_trigger_func(request):
     return []
 
 
+def lazy_trigger_func(request):
+    # the limit is passed in, but a lazy iterable is sliced anyway
+    assert request.trigger_limit in (None, 3)
+    return ({"id": i, "title": f"Book {i}"} for i in range(10))
+
+
+def cursor_trigger_func(request):
+    books = [{"id": 1, "title": "Hot Water"}, {"id": 2, "title": "Moby Dick"}]
+    return [b for b in books if b["id"] > (request.trigger_cursor or 0)]
+
+
+async def async_trigger_func(request):
+    return cursor_trigger_func(request)
+
+
+def version_etag_func(request):
+    return "v1"
+
+
 ZAPIER_TRIGGERS = {
     # reject requests where user-agent is not "Zapier"
     "STRICT_MODE": not DEBUG,
@@ -95,5 +114,44 @@ ZAPIER_TRIGGERS = {
     "TRIGGERS": {
         "new_book": "tests.settings.sample_trigger_func",
         "no_book": "tests.settings.empty_trigger_func",
+        "lazy_book": "tests.settings.lazy_trigger_func",
+        "unrecorded_book": {
+            "func": "tests.settings.sample_trigger_func",
+            "recording": "none",
+        },
+        "ids_book": {
+            "func": "tests.settings.lazy_trigger_func",
+            "recording": "ids",
+        },
+        "sampled_book": {
+            "func": "tests.settings.sample_trigger_func",
+            "recording": "sampled",
+            "recording_rate": 2,
+        },
+        "stream_book": {
+            "func": "tests.settings.lazy_trigger_func",
+            "stream": True,
+            "cursor": "id",
+        },
+        "cursor_book": {"func": "tests.settings.cursor_trigger_func", "cursor": "id"},
+        "cached_book": {"func": "tests.settings.sample_trigger_func", "cache_ttl": 60},
+        "coalesced_book": {
+            "func": "tests.settings.sample_trigger_func",
+            "coalesce": True,
+        },
+        "throttled_book": {
+            "func": "tests.settings.sample_trigger_func",
+            "max_concurrency": 1,
+        },
+        "throttled_stream_book": {
+            "func": "tests.settings.lazy_trigger_func",
+            "stream": True,
+            "max_concurrency": 1,
+        },
+        "async_book": {"func": "tests.settings.async_trigger_func", "cursor": "id"},
+        "versioned_book": {
+            "func": "tests.settings.sample_trigger_func",
+            "etag": "tests.settings.version_etag_func",
+        },
     },
 }
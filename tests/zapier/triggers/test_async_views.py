@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from zapier.triggers.async_views import AsyncTriggerView
+from zapier.triggers.models import TriggerCursor, TriggerSubscription
+
+
+@pytest.fixture
+def arf() -> AsyncRequestFactory:
+    return AsyncRequestFactory()
+
+
+def get(arf: AsyncRequestFactory, trigger: str, token: Token | None, **params):
+    url = reverse("zapier_triggers:list", kwargs={"trigger": trigger})
+    headers = {"Authorization": f"Token {token.key}"} if token else {}
+    request = arf.get(url, params, headers=headers)
+    return async_to_sync(AsyncTriggerView.as_view())(request, trigger=trigger)
+
+
+@pytest.mark.django_db
+class TestAsyncTriggerView:
+    def test_get(self, arf: AsyncRequestFactory, active_token: Token) -> None:
+        response = get(arf, "async_book", active_token)
+        assert response.status_code == 200
+        assert len(json.loads(response.content)) == 2
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.object_count == 2
+        assert TriggerCursor.objects.get_value(active_token.user, "async_book") == 2
+        # second poll - nothing new
+        response = get(arf, "async_book", active_token)
+        assert json.loads(response.content) == []
+
+    def test_get_sample(self, arf: AsyncRequestFactory, active_token: Token) -> None:
+        response = get(arf, "async_book", active_token, sample="true")
+        assert response.status_code == 200
+        assert active_token.user.zapier_trigger_events.count() == 0
+
+    def test_get_etag(self, arf: AsyncRequestFactory, active_token: Token) -> None:
+        etag = get(arf, "async_book", active_token, sample="true")["ETag"]
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "async_book"})
+        request = arf.get(
+            url,
+            {"sample": "true"},
+            headers={
+                "Authorization": f"Token {active_token.key}",
+                "If-None-Match": etag,
+            },
+        )
+        response = async_to_sync(AsyncTriggerView.as_view())(
+            request, trigger="async_book"
+        )
+        assert response.status_code == 304
+
+    def test_get_unauthenticated(self, arf: AsyncRequestFactory) -> None:
+        assert get(arf, "async_book", None).status_code == 401
+
+    def test_get_missing_trigger(
+        self, arf: AsyncRequestFactory, active_token: Token
+    ) -> None:
+        assert get(arf, "old_book", active_token).status_code == 404
+
+    def test_get_missing_trigger__unauthenticated(
+        self, arf: AsyncRequestFactory
+    ) -> None:
+        # does not reveal whether the trigger exists
+        assert get(arf, "old_book", None).status_code == 401
+
+    def test_get_sync_trigger(
+        self, arf: AsyncRequestFactory, active_token: Token
+    ) -> None:
+        # sync trigger functions are handled by the sync view
+        response = get(arf, "new_book", active_token)
+        assert response.status_code == 200
+        assert active_token.user.zapier_trigger_events.count() == 1
+
+    def test_post(self, arf: AsyncRequestFactory, active_token: Token) -> None:
+        url = reverse("zapier_triggers:subscribe", kwargs={"trigger": "new_book"})
+        request = arf.post(
+            url,
+            {"hookUrl": "https://hooks.zapier.com/1", "zapId": "sub:1"},
+            content_type="application/json",
+            headers={"Authorization": f"Token {active_token.key}"},
+        )
+        response = async_to_sync(AsyncTriggerView.as_view())(
+            request, trigger="new_book"
+        )
+        assert response.status_code == 201
+        assert TriggerSubscription.objects.get().zap == "sub:1"
@@ -0,0 +1,70 @@
+from unittest import mock
+
+import pytest
+
+from zapier.triggers.cache import (
+    LocalCache,
+    get_cache_key,
+    get_cached_data,
+    invalidate_trigger_cache,
+    set_cached_data,
+)
+
+
+@pytest.mark.django_db
+class TestTriggerCache:
+    def test_get_cache_key(self, uf) -> None:
+        user = uf()
+        key = get_cache_key("new_book", user, sample=False, cursor=None)
+        assert key == get_cache_key("new_book", user, sample=False, cursor=None)
+        assert key != get_cache_key("new_book", user, sample=True, cursor=None)
+        assert key != get_cache_key("new_book", user, sample=False, cursor=1)
+        assert key != get_cache_key("old_book", user, sample=False, cursor=None)
+        assert key != get_cache_key("new_book", uf(), sample=False, cursor=None)
+
+    def test_set_cached_data(self, uf) -> None:
+        user = uf()
+        key = get_cache_key("new_book", user, sample=False, cursor=None)
+        assert get_cached_data(key) is None
+        set_cached_data(key, [{"id": 1}], ttl=60)
+        assert get_cached_data(key) == [{"id": 1}]
+
+    def test_invalidate_trigger_cache(self, uf) -> None:
+        user = uf()
+        key = get_cache_key("new_book", user, sample=False, cursor=None)
+        invalidate_trigger_cache("new_book")
+        assert get_cache_key("new_book", user, sample=False, cursor=None) != key
+
+    def test_invalidate_trigger_cache__user(self, uf) -> None:
+        user1, user2 = uf(), uf()
+        key1 = get_cache_key("new_book", user1, sample=False, cursor=None)
+        key2 = get_cache_key("new_book", user2, sample=False, cursor=None)
+        invalidate_trigger_cache("new_book", user1)
+        assert get_cache_key("new_book", user1, sample=False, cursor=None) != key1
+        assert get_cache_key("new_book", user2, sample=False, cursor=None) == key2
+
+
+class TestLocalCache:
+    def test_get(self) -> None:
+        cache = LocalCache(max_size=2, ttl=60)
+        assert cache.get("foo") == (False, None)
+        cache.set("foo", None)
+        assert cache.get("foo") == (True, None)
+        cache.delete("foo")
+        assert cache.get("foo") == (False, None)
+
+    def test_get__expired(self) -> None:
+        cache = LocalCache(max_size=2, ttl=60)
+        cache.set("foo", 1)
+        with mock.patch("zapier.triggers.cache.time.monotonic", return_value=1e12):
+            assert cache.get("foo") == (False, None)
+        assert not cache.entries
+
+    def test_set__lru(self) -> None:
+        cache = LocalCache(max_size=2, ttl=60)
+        cache.set("foo", 1)
+        cache.set("bar", 2)
+        # reading foo makes bar the least recently used
+        cache.get("foo")
+        cache.set("baz", 3)
+        assert list(cache.entries) == ["foo", "baz"]
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from zapier.triggers.circuit import CircuitBreaker, get_circuit_breaker
+
+
+def test_get_circuit_breaker() -> None:
+    breaker = get_circuit_breaker("https://hooks.zapier.com/hooks/1")
+    assert breaker.host == "hooks.zapier.com"
+    assert get_circuit_breaker("https://HOOKS.zapier.com/hooks/2") is breaker
+    assert get_circuit_breaker("https://example.com/") is not breaker
+
+
+@mock.patch("zapier.triggers.circuit.time.monotonic")
+def test_circuit_breaker(mock_monotonic) -> None:
+    mock_monotonic.return_value = 100
+    breaker = CircuitBreaker("example.com", threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow_request()
+    # half-open: one trial request is allowed through
+    mock_monotonic.return_value = 110
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow_request()
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from zapier.triggers.cache import get_cache
+from zapier.triggers.coalesce import single_flight
+
+
+def test_single_flight() -> None:
+    started, release = threading.Event(), threading.Event()
+
+    def fetch() -> list[int]:
+        started.set()
+        release.wait()
+        return [1]
+
+    func = mock.Mock(side_effect=fetch)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(single_flight, "foo", func)
+        started.wait()
+        followers = [executor.submit(single_flight, "foo", func) for _ in range(3)]
+        time.sleep(0.1)
+        release.set()
+        results = [f.result() for f in [leader, *followers]]
+    assert results == [[1]] * 4
+    func.assert_called_once()
+
+
+def test_single_flight__exception() -> None:
+    func = mock.Mock(side_effect=ValueError)
+    with pytest.raises(ValueError):
+        single_flight("foo", func)
+    # the failed computation is not shared with later callers
+    func.side_effect = None
+    func.return_value = [1]
+    assert single_flight("foo", func) == [1]
+
+
+def test_single_flight__across_processes() -> None:
+    # another process has the lock, and publishes its result
+    cache = get_cache()
+    cache.add("foo:lock", "abc", timeout=10)
+    threading.Timer(0.1, cache.set, ["foo:result:abc", [2]]).start()
+    func = mock.Mock(return_value=[1])
+    assert single_flight("foo", func, timeout=5) == [2]
+    func.assert_not_called()
+
+
+def test_single_flight__lock_released() -> None:
+    # another process has the lock, and fails without a result
+    cache = get_cache()
+    cache.add("foo:lock", "abc", timeout=10)
+    threading.Timer(0.1, cache.delete, ["foo:lock"]).start()
+    func = mock.Mock(return_value=[1])
+    assert single_flight("foo", func, timeout=5) == [1]
+    func.assert_called_once()
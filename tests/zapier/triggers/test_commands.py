@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from zapier.triggers.event import enqueue
+from zapier.triggers.models import TriggerDelivery, TriggerEvent, TriggerSubscription
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_zapier_push_worker(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    for i in range(3):
+        enqueue(active_subscription, {"id": i})
+    call_command("zapier_push_worker", "--once", "--batch-size=2")
+    assert mock_get_session.return_value.post.call_count == 3
+    assert not TriggerDelivery.objects.pending().exists()
+    assert TriggerEvent.objects.count() == 3
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.PUSH_RETRIES", 0)
+@mock.patch("zapier.triggers.event.get_session")
+def test_zapier_push_worker__failed(
+    mock_get_session, active_subscription: TriggerSubscription, caplog
+) -> None:
+    mock_get_session.return_value.post.side_effect = [
+        mock.Mock(status_code=200),
+        mock.Mock(status_code=503),
+    ]
+    enqueue(active_subscription, {"id": 1})
+    failed = enqueue(active_subscription, {"id": 2})
+    stdout = StringIO()
+    with mock.patch.dict("zapier.triggers.settings._settings", OUTBOX_MAX_ATTEMPTS=1):
+        call_command("zapier_push_worker", "--once", "--max-workers=1", stdout=stdout)
+    assert stdout.getvalue() == "Pushed 1 deliveries.\n"
+    assert list(TriggerDelivery.objects.abandoned(1)) == [failed]
+    assert "Abandoned" in caplog.text
+
+
+@pytest.mark.django_db
+def test_zapier_compress_events(active_subscription: TriggerSubscription) -> None:
+    for i in range(3):
+        TriggerEvent.objects.create(
+            user=active_subscription.user,
+            trigger=active_subscription.trigger,
+            http_method="POST",
+            event_data={"id": i, "title": "A Book" * 10},
+        )
+    call_command("zapier_compress_events", "--batch-size=2", stdout=StringIO())
+    assert not TriggerEvent.objects.filter(event_data__isnull=False).exists()
+    events = TriggerEvent.objects.order_by("id")
+    assert [e.event_data["id"] for e in events] == [0, 1, 2]
+    assert all(e.event_data_compressed for e in events)
+
+
+@pytest.mark.django_db
+def test_zapier_compress_events__build_dictionary(
+    active_subscription: TriggerSubscription, tmp_path
+) -> None:
+    TriggerEvent.objects.create(
+        user=active_subscription.user,
+        trigger=active_subscription.trigger,
+        http_method="POST",
+        event_data={"id": 1},
+    )
+    path = tmp_path / "foo.zdict"
+    call_command(
+        "zapier_compress_events",
+        "--trigger=foo",
+        f"--build-dictionary={path}",
+        stdout=StringIO(),
+    )
+    assert path.read_bytes() == b'{"id": 1}'
+    with pytest.raises(CommandError):
+        call_command("zapier_compress_events", f"--build-dictionary={path}")
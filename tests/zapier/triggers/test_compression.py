@@ -0,0 +1,61 @@
+import zlib
+from unittest import mock
+
+import pytest
+
+from zapier.triggers.compression import (
+    build_dictionary,
+    compress,
+    decompress,
+    load_dictionary,
+)
+
+DICTIONARY = b'{"id": 0, "title": "A Book", "author": "An Author"}'
+
+
+@pytest.fixture
+def dictionaries():
+    with (
+        mock.patch.dict(
+            "zapier.triggers.compression.DICTIONARIES", {"new_book": DICTIONARY}
+        ),
+        mock.patch.dict(
+            "zapier.triggers.compression._dictionaries_by_id",
+            {zlib.adler32(DICTIONARY): DICTIONARY},
+        ),
+    ):
+        yield
+
+
+class TestCompression:
+    def test_compress(self) -> None:
+        data = b'{"id": 1, "title": "A Book"}' * 10
+        compressed = compress(data, "new_book")
+        assert len(compressed) < len(data)
+        assert decompress(compressed) == data
+        assert decompress(memoryview(compressed)) == data
+
+    def test_compress__dictionary(self, dictionaries) -> None:
+        data = b'{"id": 1, "title": "A Book", "author": "An Author"}'
+        compressed = compress(data, "new_book")
+        assert len(compressed) < len(compress(data, "new_film"))
+        assert decompress(compressed) == data
+
+    def test_decompress__unknown_dictionary(self, dictionaries) -> None:
+        compressed = compress(b'{"id": 1}', "new_book")
+        with mock.patch.dict(
+            "zapier.triggers.compression._dictionaries_by_id", clear=True
+        ):
+            with pytest.raises(ValueError):
+                decompress(compressed)
+
+    def test_load_dictionary(self, tmp_path) -> None:
+        path = tmp_path / "new_book.zdict"
+        path.write_bytes(DICTIONARY)
+        assert load_dictionary("new_book", DICTIONARY) == DICTIONARY
+        assert load_dictionary("new_book", str(path)) == DICTIONARY
+
+    def test_build_dictionary(self) -> None:
+        samples = [b"foo", b"bar", b"foo", b"baz"]
+        assert build_dictionary(samples) == b"foobarbaz"
+        assert build_dictionary(samples, size=4) == b"rbaz"
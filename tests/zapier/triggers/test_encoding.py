@@ -0,0 +1,94 @@
+import datetime
+import decimal
+import uuid
+from unittest import mock
+
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse as DjangoJsonResponse
+from django.utils.translation import gettext_lazy
+
+from zapier.triggers.encoding import (
+    OrjsonBackend,
+    StdlibJSONBackend,
+    decode_json,
+    encode_json,
+    get_json_backend,
+)
+from zapier.triggers.models import TriggerEvent, TriggerSubscription
+from zapier.triggers.response import JsonResponse
+
+BACKENDS = [StdlibJSONBackend, OrjsonBackend]
+
+DATA = {
+    "datetime": datetime.datetime(
+        2022, 1, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+    ),
+    "date": datetime.date(2022, 1, 1),
+    "time": datetime.time(12, 30),
+    "duration": datetime.timedelta(days=1, seconds=5),
+    "decimal": decimal.Decimal("1.10"),
+    "uuid": uuid.UUID("2f6b4b7c-5b8e-4a0e-9c43-1d3c1a1e4f6a"),
+    "lazy": gettext_lazy("Hello"),
+    "list": [1, 2.5, None, True],
+}
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda b: b.__name__)
+def backend(request: pytest.FixtureRequest):
+    if request.param is OrjsonBackend:
+        pytest.importorskip("orjson")
+    path = f"zapier.triggers.encoding.{request.param.__name__}"
+    get_json_backend.cache_clear()
+    with mock.patch.dict("zapier.triggers.settings._settings", JSON_BACKEND=path):
+        yield get_json_backend()
+    get_json_backend.cache_clear()
+
+
+def test_encode_json(backend) -> None:
+    # all backends must encode values in the same way as DjangoJSONEncoder
+    expected = StdlibJSONBackend().loads(StdlibJSONBackend().dumps(DATA))
+    assert decode_json(encode_json(DATA)) == expected
+    assert expected["datetime"] == "2022-01-01T12:30:15.123Z"
+    assert expected["decimal"] == "1.10"
+
+
+def test_encode_json__pretty(backend) -> None:
+    pretty = encode_json({"b": 1, "a": 2}, pretty=True).decode()
+    assert pretty.index('"a"') < pretty.index('"b"')
+    assert "\n" in pretty
+
+
+def test_decode_json__invalid(backend) -> None:
+    with pytest.raises(ValueError):
+        decode_json(b"{invalid")
+
+
+def test_json_response(backend) -> None:
+    response = JsonResponse({"uuid": DATA["uuid"]})
+    assert response["Content-Type"] == "application/json"
+    assert decode_json(response.content) == {"uuid": str(DATA["uuid"])}
+    with pytest.raises(TypeError):
+        JsonResponse([1, 2])
+    assert decode_json(JsonResponse([1, 2], safe=False).content) == [1, 2]
+    assert isinstance(response, DjangoJsonResponse)
+
+
+def test_json_response__json_dumps_params(backend) -> None:
+    response = JsonResponse({"b": 1, "a": 2}, json_dumps_params={"sort_keys": True})
+    assert response.content == b'{"a": 2, "b": 1}'
+    response = JsonResponse({"a": 1}, encoder=DjangoJSONEncoder, status=201)
+    assert response.status_code == 201
+    assert response.content == b'{"a": 1}'
+
+
+@pytest.mark.django_db
+def test_event_data(backend, active_subscription: TriggerSubscription) -> None:
+    event = TriggerEvent.objects.create(
+        user=active_subscription.user,
+        trigger=active_subscription.trigger,
+        event_data=DATA,
+        status_code=200,
+    )
+    event.refresh_from_db()
+    assert event.event_data == decode_json(encode_json(DATA))
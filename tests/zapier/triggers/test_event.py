@@ -1,17 +1,33 @@
+import datetime
+import json
 from unittest import mock
 
 import pytest
+from asgiref.sync import async_to_sync
+from requests.exceptions import Timeout
 
-from zapier.triggers.event import push
+from zapier.triggers.circuit import get_circuit_breaker
+from zapier.triggers.encoding import encode_json
+from zapier.triggers.event import (
+    apush_many,
+    batch_objects,
+    enqueue_many,
+    push,
+    push_batched,
+    push_deliveries,
+    push_many,
+    push_trigger,
+)
+from zapier.triggers.models import TriggerEvent
 from zapier.triggers.models.trigger_subscription import TriggerSubscription
 
 
 @pytest.mark.django_db
-@mock.patch("zapier.triggers.event.requests")
-def test_push(mock_requests, active_subscription: TriggerSubscription) -> None:
+@mock.patch("zapier.triggers.event.get_session")
+def test_push(mock_get_session, active_subscription: TriggerSubscription) -> None:
     event_data = {"foo": "Bar"}
     # fake a POST that returns a 201
-    mock_requests.post.return_value = mock.Mock(status_code=201)
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=201)
     event = push(active_subscription, event_data)
     assert event.user == active_subscription.user
     assert event.trigger == active_subscription.trigger
@@ -21,3 +37,332 @@ def test_push(mock_requests, active_subscription: TriggerSubscription) -> None:
     assert event.duration == event.finished_at - event.started_at
     assert event.http_method == "POST"
     assert event.status_code == 201
+    assert event.object_count == 1
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_many(mock_get_session, active_subscription: TriggerSubscription) -> None:
+    other_subscription = TriggerSubscription.objects.subscribe(
+        user=active_subscription.user,
+        trigger=active_subscription.trigger,
+        zap="subscription:456",
+        target_url="https://www.example.com",
+    )
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    result = push_many([active_subscription, other_subscription], {"foo": "Bar"})
+    assert mock_get_session.return_value.post.call_count == 2
+    assert len(result.events) == 2
+    assert {e.subscription for e in result.events} == {
+        active_subscription,
+        other_subscription,
+    }
+    assert all(e.pk for e in result.events)
+    assert result.duration == result.finished_at - result.started_at
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_many__error(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.side_effect = Timeout()
+    with mock.patch("zapier.triggers.event.PUSH_RETRIES", 0):
+        result = push_many([active_subscription], {"foo": "Bar"})
+    event = result.events[0]
+    assert event.status_code is None
+    assert event.error == "Timeout()"
+    assert event.is_retryable
+    assert TriggerEvent.objects.get() == event
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_many__batch_size(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    subscriptions = [active_subscription] + [
+        TriggerSubscription.objects.subscribe(
+            user=active_subscription.user,
+            trigger=active_subscription.trigger,
+            zap=f"subscription:{i}",
+            target_url="https://www.example.com",
+        )
+        for i in range(4)
+    ]
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    with mock.patch(
+        "zapier.triggers.event.TriggerEvent.objects.bulk_create",
+        wraps=TriggerEvent.objects.bulk_create,
+    ) as mock_bulk_create:
+        result = push_many(subscriptions, {"foo": "Bar"}, batch_size=2)
+    # 5 events written in batches of 2, 2, 1
+    assert [len(c.args[0]) for c in mock_bulk_create.call_args_list] == [2, 2, 1]
+    assert TriggerEvent.objects.count() == 5
+    assert {e.uuid for e in result.events} == set(
+        TriggerEvent.objects.values_list("uuid", flat=True)
+    )
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_deliveries(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    delivered, failed = enqueue_many(
+        [active_subscription, active_subscription], {"foo": "Bar"}
+    )
+    mock_get_session.return_value.post.side_effect = [
+        mock.Mock(status_code=200),
+        Timeout(),
+    ]
+    with mock.patch("zapier.triggers.event.PUSH_RETRIES", 0):
+        result = push_deliveries([delivered, failed], max_workers=1)
+    assert {e.uuid for e in result.events} == {delivered.uuid, failed.uuid}
+    delivered.refresh_from_db()
+    failed.refresh_from_db()
+    assert delivered.is_delivered
+    assert not failed.is_delivered
+    event = TriggerEvent.objects.get(status_code=200)
+    assert event.uuid == delivered.uuid
+    assert event.event_data == delivered.event_data
+    assert event.subscription == active_subscription
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.time.sleep")
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__retry(
+    mock_get_session, mock_sleep, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.side_effect = [
+        Timeout(),
+        mock.Mock(status_code=503),
+        mock.Mock(status_code=200),
+    ]
+    event = push(active_subscription, {"foo": "Bar"})
+    assert event.status_code == 200
+    assert event.attempt == 3
+    assert mock_sleep.call_count == 2
+    attempts = TriggerEvent.objects.order_by("attempt")
+    assert [(e.attempt, e.status_code) for e in attempts] == [
+        (1, None),
+        (2, 503),
+        (3, 200),
+    ]
+    assert {e.uuid for e in attempts} == {event.uuid}
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__no_retry(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=404)
+    event = push(active_subscription, {"foo": "Bar"})
+    assert event.status_code == 404
+    assert TriggerEvent.objects.count() == 1
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__circuit_open(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    breaker = get_circuit_breaker(active_subscription.target_url)
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    event = push(active_subscription, {"foo": "Bar"})
+    mock_get_session.return_value.post.assert_not_called()
+    assert event.status_code is None
+    assert "is open" in event.error
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__gone(mock_get_session, active_subscription: TriggerSubscription) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=410)
+    event = push(active_subscription, {"foo": "Bar"})
+    assert event.status_code == 410
+    active_subscription.refresh_from_db()
+    assert active_subscription.is_inactive
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "status_codes,failures,active",
+    [((200, 404), 1, True), ((404, 200), 1, True), ((200, 410), 0, False)],
+)
+@mock.patch("zapier.triggers.event.PUSH_RETRIES", 0)
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__health_same_subscription(
+    mock_get_session,
+    active_subscription: TriggerSubscription,
+    status_codes: tuple[int, int],
+    failures: int,
+    active: bool,
+) -> None:
+    mock_get_session.return_value.post.side_effect = [
+        mock.Mock(status_code=c) for c in status_codes
+    ]
+    unsubscribe = TriggerSubscription.unsubscribe
+    with mock.patch.object(
+        TriggerSubscription, "unsubscribe", autospec=True, side_effect=unsubscribe
+    ) as mock_unsubscribe:
+        push_many([active_subscription, active_subscription], {}, max_workers=1)
+    # each subscription is updated once, by its worst outcome
+    active_subscription.refresh_from_db()
+    assert active_subscription.consecutive_failures == failures
+    assert not active_subscription.last_success_at
+    assert active_subscription.is_active == active
+    assert mock_unsubscribe.call_count == (0 if active else 1)
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.PAUSE_AFTER_FAILURES", 2)
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__health(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    post = mock_get_session.return_value.post
+    post.return_value = mock.Mock(status_code=404)
+    push(active_subscription, {"foo": "Bar"})
+    active_subscription.refresh_from_db()
+    assert active_subscription.consecutive_failures == 1
+    assert active_subscription.last_failure_at
+    assert active_subscription.is_active
+    post.return_value = mock.Mock(status_code=200)
+    push(active_subscription, {"foo": "Bar"})
+    active_subscription.refresh_from_db()
+    assert active_subscription.consecutive_failures == 0
+    assert active_subscription.last_success_at
+    post.return_value = mock.Mock(status_code=404)
+    push_many([active_subscription], {"foo": "Bar"})
+    push_many([active_subscription], {"foo": "Bar"})
+    active_subscription.refresh_from_db()
+    assert active_subscription.consecutive_failures == 2
+    assert active_subscription.is_paused
+    assert not TriggerSubscription.objects.active().exists()
+
+
+@pytest.mark.parametrize(
+    "max_objects,max_bytes,batch_sizes",
+    [
+        (2, 1000, [2, 2, 1]),
+        (10, 1000, [5]),
+        # each object is 9 bytes - {"id": 0} - so 2 objects + "[, ]" is 22 bytes
+        (10, 22, [2, 2, 1]),
+        (10, 21, [1, 1, 1, 1, 1]),
+        # an object larger than max_bytes is sent on its own
+        (10, 1, [1, 1, 1, 1, 1]),
+    ],
+)
+def test_batch_objects(max_objects: int, max_bytes: int, batch_sizes: list) -> None:
+    objects = [{"id": i} for i in range(5)]
+    batches = list(batch_objects(objects, max_objects, max_bytes))
+    assert [len(b) for b, _ in batches] == batch_sizes
+    assert [o for b, _ in batches for o in b] == objects
+    for batch, encoded in batches:
+        assert encoded == json.dumps(batch).encode()
+        if len(batch) > 1:
+            assert len(encoded) <= max_bytes
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_batched(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    objects = [{"id": i} for i in range(5)]
+    result = push_batched([active_subscription], objects, max_objects=2)
+    assert mock_get_session.return_value.post.call_count == 3
+    assert sorted(e.object_count for e in result.events) == [1, 2, 2]
+    assert sorted(o["id"] for e in result.events for o in e.event_data) == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.encode_json", wraps=encode_json)
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_many__encoded_once(
+    mock_get_session, mock_encode_json, active_subscription: TriggerSubscription
+) -> None:
+    other_subscription = TriggerSubscription.objects.subscribe(
+        user=active_subscription.user,
+        trigger=active_subscription.trigger,
+        zap="subscription:456",
+        target_url="https://www.example.com",
+    )
+    post = mock_get_session.return_value.post
+    post.return_value = mock.Mock(status_code=200)
+    event_data = {"foo": "Bar", "at": datetime.date(2022, 1, 1)}
+    push_many([active_subscription, other_subscription], event_data)
+    mock_encode_json.assert_called_once_with(event_data)
+    bodies = {c.kwargs["data"] for c in post.call_args_list}
+    assert bodies == {b'{"foo": "Bar", "at": "2022-01-01"}'}
+    for event in TriggerEvent.objects.all():
+        assert event.event_data == {"foo": "Bar", "at": "2022-01-01"}
+
+
+@pytest.mark.django_db
+def test_push_trigger__no_subscribers() -> None:
+    data = mock.Mock()
+    assert push_trigger("foo", data) is None
+    data.assert_not_called()
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_trigger(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    TriggerSubscription.objects.subscribe(
+        user=active_subscription.user,
+        trigger=active_subscription.trigger,
+        zap="subscription:456",
+        target_url="https://www.example.com",
+    )
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    data = mock.Mock(return_value={"foo": "Bar"})
+    result = push_trigger("foo", data)
+    assert result and len(result.events) == 2
+    data.assert_called_once_with()
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.event.get_session")
+def test_push_trigger__batched(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    objects = TriggerSubscription.objects.values("zap")
+    result = push_trigger("foo", objects, batched=True)
+    assert result and result.events[0].event_data == [{"zap": active_subscription.zap}]
+
+
+@pytest.mark.django_db
+def test_apush_many(active_subscription: TriggerSubscription) -> None:
+    httpx = pytest.importorskip("httpx")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with mock.patch("zapier.triggers.event.get_async_client", return_value=client):
+        result = async_to_sync(apush_many)(
+            TriggerSubscription.objects.all(), {"foo": "Bar"}
+        )
+    assert [r.content for r in requests] == [b'{"foo": "Bar"}']
+    event = TriggerEvent.objects.get()
+    assert result.events[0].uuid == event.uuid
+    assert event.status_code == 200
+    active_subscription.refresh_from_db()
+    assert active_subscription.last_success_at
@@ -0,0 +1,109 @@
+from unittest import mock
+
+import pytest
+
+from zapier.triggers.admin import TriggerEventAdmin
+from zapier.triggers.fields import get_encoded_value, set_encoded_value
+from zapier.triggers.models import TriggerEvent, TriggerSubscription
+
+
+@pytest.mark.django_db
+class TestEncodedJSONField:
+    def event(self, subscription: TriggerSubscription) -> TriggerEvent:
+        return TriggerEvent(
+            user=subscription.user, trigger=subscription.trigger, status_code=200
+        )
+
+    def test_encoded(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription)
+        # the encoded value is written as-is, even if it doesn't match
+        set_encoded_value(event, "event_data", {"foo": "bar"}, b'{"foo": "baz"}')
+        assert get_encoded_value(event, "event_data") == b'{"foo": "baz"}'
+        event.save()
+        event.refresh_from_db()
+        assert event.event_data == {"foo": "baz"}
+
+    def test_encoded__replaced(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription)
+        set_encoded_value(event, "event_data", {"foo": "bar"}, b'{"foo": "baz"}')
+        event.event_data = {"foo": "qux"}
+        assert get_encoded_value(event, "event_data") is None
+        event.save()
+        event.refresh_from_db()
+        assert event.event_data == {"foo": "qux"}
+
+    def test_bulk_create(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription)
+        set_encoded_value(event, "event_data", [1, 2], b"[1, 2, 3]")
+        TriggerEvent.objects.bulk_create([event])
+        assert TriggerEvent.objects.get().event_data == [1, 2, 3]
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.compression.COMPRESS_EVENT_DATA", True)
+class TestCompressibleJSONField:
+    def event(self, subscription: TriggerSubscription, **kwargs) -> TriggerEvent:
+        return TriggerEvent(
+            user=subscription.user,
+            trigger=subscription.trigger,
+            status_code=200,
+            **kwargs,
+        )
+
+    def test_save(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription, event_data={"foo": "bar"})
+        event.save()
+        assert TriggerEvent.objects.filter(event_data__isnull=True).count() == 1
+        event.refresh_from_db()
+        assert event.event_data == {"foo": "bar"}
+        assert event.event_data_compressed
+
+    def test_save__encoded(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription)
+        set_encoded_value(event, "event_data", {"foo": "bar"}, b'{"foo": "baz"}')
+        event.save()
+        assert TriggerEvent.objects.get().event_data == {"foo": "baz"}
+
+    def test_save__uncompressed(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription, event_data={"foo": "bar"})
+        event.save()
+        with mock.patch("zapier.triggers.compression.COMPRESS_EVENT_DATA", False):
+            event.save()
+        event = TriggerEvent.objects.get(event_data__foo="bar")
+        assert event.event_data_compressed is None
+
+    def test_bulk_create(self, active_subscription: TriggerSubscription) -> None:
+        event = self.event(active_subscription, event_data=[1, 2, 3])
+        TriggerEvent.objects.bulk_create([event])
+        assert TriggerEvent.objects.get().event_data == [1, 2, 3]
+
+    def test_deferred(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        self.event(active_subscription, event_data=[1, 2, 3]).save()
+        with django_assert_num_queries(1):
+            event = TriggerEvent.objects.only("trigger").get()
+        with django_assert_num_queries(1):
+            assert event.event_data == [1, 2, 3]
+
+    def test_decompress__error(self, active_subscription: TriggerSubscription) -> None:
+        self.event(active_subscription, event_data={"foo": "bar"}).save()
+        TriggerEvent.objects.update(event_data_compressed=b"not zlib")
+        # the event still loads, without its data
+        assert TriggerEvent.objects.get().event_data is None
+
+    def test_decompress__removed_dictionary(
+        self, active_subscription: TriggerSubscription
+    ) -> None:
+        zdict = b'{"foo": "bar"}'
+        with mock.patch.dict(
+            "zapier.triggers.compression.DICTIONARIES", {"foo": zdict}
+        ):
+            self.event(active_subscription, event_data={"foo": "bar"}).save()
+        assert TriggerEvent.objects.get().event_data is None
+
+    def test_admin(self, active_subscription: TriggerSubscription) -> None:
+        self.event(active_subscription, event_data={"foo": "bar"}).save()
+        event = TriggerEvent.objects.get()
+        html = TriggerEventAdmin(TriggerEvent, None)._event_data(event)
+        assert "foo" in html
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from zapier.triggers import http
+
+
+@pytest.fixture(autouse=True)
+def reset_session() -> None:
+    http.close_session()
+    yield
+    http.close_session()
+
+
+def test_get_session() -> None:
+    session = http.get_session()
+    assert http.get_session() is session
+    adapter = session.get_adapter("https://hooks.zapier.com")
+    assert adapter._pool_connections == http.POOL_CONNECTIONS
+    assert adapter._pool_maxsize == http.POOL_MAXSIZE
+
+
+def test_close_session() -> None:
+    session = http.get_session()
+    with mock.patch.object(session, "close") as mock_close:
+        http.close_session()
+    mock_close.assert_called_once()
+    assert http.get_session() is not session
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork")
+def test_reset_after_fork() -> None:
+    session = http.get_session()
+    with mock.patch.object(session, "close") as mock_close:
+        http._reset_after_fork()
+    # the parent session must not be closed by the child
+    mock_close.assert_not_called()
+    assert http.get_session() is not session
+
+
+@mock.patch.dict("sys.modules", {"httpx": None})
+def test_create_async_client__missing() -> None:
+    with pytest.raises(ImproperlyConfigured):
+        http.create_async_client()
+
+
+def test_get_async_client() -> None:
+    pytest.importorskip("httpx")
+
+    async def get_clients():
+        return http.get_async_client(), http.get_async_client()
+
+    client, same = asyncio.run(get_clients())
+    assert same is client
+    # each event loop has its own client
+    other, _ = asyncio.run(get_clients())
+    assert other is not client
@@ -0,0 +1,26 @@
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from zapier.triggers.middleware import JsonRequestDumpMiddleware
+
+
+@pytest.mark.parametrize(
+    "response,logged",
+    [
+        (HttpResponse(b'{"id": 1}'), '"id": 1'),
+        (StreamingHttpResponse(iter([b'{"id": 1}'])), "(streaming)"),
+    ],
+)
+def test_json_request_dump_middleware(
+    rf: RequestFactory, settings, caplog, response: HttpResponse, logged: str
+) -> None:
+    settings.DEBUG = True
+    middleware = JsonRequestDumpMiddleware(lambda request: response)
+    request = rf.post("/", {}, content_type="application/json")
+    with caplog.at_level("DEBUG", logger="zapier.triggers.middleware"):
+        assert middleware(request) is response
+    assert logged in caplog.text
+    # the streamed content is left for the client
+    if response.streaming:
+        assert b"".join(response.streaming_content) == b'{"id": 1}'
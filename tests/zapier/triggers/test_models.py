@@ -1,11 +1,15 @@
 from datetime import timedelta
+from uuid import uuid4
 
+import django
 import pytest
 from django.conf import settings as django_settings
+from django.db import IntegrityError
+from django.utils.timezone import now as tz_now
 
-from zapier.triggers.models import TriggerSubscription
+from zapier.triggers.cache import local_cache
+from zapier.triggers.models import TriggerDelivery, TriggerSubscription
 from zapier.triggers.models.trigger_event import TriggerEvent
-from zapier.triggers.models.trigger_subscription import TriggerSubscriptionError
 
 
 @pytest.mark.django_db
@@ -16,27 +20,175 @@ class TestTriggerSubscriptionQuerySet:
     def test_active__empty(self, inactive_subscription: TriggerSubscription) -> None:
         assert TriggerSubscription.objects.active().count() == 0
 
+    def test_active__paused(self, active_subscription: TriggerSubscription) -> None:
+        active_subscription.pause()
+        assert TriggerSubscription.objects.active().count() == 0
+        active_subscription.resume()
+        assert TriggerSubscription.objects.active().count() == 1
+
+    def test_record_failure(self, active_subscription: TriggerSubscription) -> None:
+        qs = TriggerSubscription.objects.all()
+        assert qs.record_failure() == 0
+        assert qs.record_failure(pause_after=3) == 0
+        assert qs.record_failure(pause_after=3) == 1
+        active_subscription.refresh_from_db()
+        assert active_subscription.consecutive_failures == 3
+        assert active_subscription.is_paused
+        assert not active_subscription.is_active
+        qs.record_success()
+        active_subscription.refresh_from_db()
+        assert active_subscription.consecutive_failures == 0
+
 
 @pytest.mark.django_db
 class TestTriggerSubscriptionManager:
-    def test_subscriber(self, user: django_settings.AUTH_USER_MODEL) -> None:
-        TriggerSubscription.objects.subscribe(
+    def test_subscribe(self, user: django_settings.AUTH_USER_MODEL) -> None:
+        subscription = TriggerSubscription.objects.subscribe(
             user=user,
             trigger="foo",
             zap="subscription:123",
             target_url="www.foogle.com",
         )
-        with pytest.raises(TriggerSubscriptionError):
-            TriggerSubscription.objects.subscribe(
+        assert subscription.pk
+        assert TriggerSubscription.objects.get().uuid == subscription.uuid
+
+    def test_subscribe__reactivate(
+        self, inactive_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        inactive_subscription.consecutive_failures = 3
+        inactive_subscription.pause()
+        user = inactive_subscription.user
+        # Django < 5.0 reads the upserted row back to get its primary key
+        with django_assert_num_queries(1 if django.VERSION >= (5, 0) else 2):
+            subscription = TriggerSubscription.objects.subscribe(
                 user=user,
-                trigger="foo",
-                zap="subscription:123",
+                trigger=inactive_subscription.trigger,
+                zap=inactive_subscription.zap,
                 target_url="www.foogle.com",
             )
+        assert TriggerSubscription.objects.count() == 1
+        inactive_subscription.refresh_from_db()
+        assert inactive_subscription.is_active
+        assert inactive_subscription.uuid == subscription.uuid
+        assert inactive_subscription.target_url == "www.foogle.com"
+        assert inactive_subscription.consecutive_failures == 0
+
+    def test_unsubscribe(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        user = active_subscription.user
+        with django_assert_num_queries(1):
+            assert TriggerSubscription.objects.unsubscribe(
+                user=user, trigger="foo", uuid=active_subscription.uuid
+            )
+        active_subscription.refresh_from_db()
+        assert active_subscription.is_inactive
+        assert not TriggerSubscription.objects.unsubscribe(
+            user=user, trigger="foo", uuid=uuid4()
+        )
+
+    def test_unsubscribe__mismatch(
+        self, uf, active_subscription: TriggerSubscription
+    ) -> None:
+        uuid = active_subscription.uuid
+        assert not TriggerSubscription.objects.unsubscribe(
+            user=active_subscription.user, trigger="bar", uuid=uuid
+        )
+        assert not TriggerSubscription.objects.unsubscribe(
+            user=uf(), trigger="foo", uuid=uuid
+        )
+        active_subscription.refresh_from_db()
+        assert active_subscription.is_active
+
+    def test_cached_active(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        with django_assert_num_queries(2):
+            assert TriggerSubscription.objects.cached_active("foo") == [
+                active_subscription
+            ]
+            assert TriggerSubscription.objects.cached_active("foo") == [
+                active_subscription
+            ]
+            assert TriggerSubscription.objects.cached_active("bar") == []
+        with django_assert_num_queries(0):
+            assert TriggerSubscription.objects.cached_active("bar") == []
+
+    def test_cached_active__fields(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        TriggerSubscription.objects.cached_active("foo")
+        with django_assert_num_queries(0):
+            (subscription,) = TriggerSubscription.objects.cached_active("foo")
+            assert subscription.user_id == active_subscription.user_id
+            assert subscription.target_url == active_subscription.target_url
+        # the user (and any field not needed to push) is not cached
+        assert not TriggerSubscription.user.is_cached(subscription)
+        assert subscription.get_deferred_fields() >= {"uuid", "subscribed_at"}
+
+    def test_has_subscribers(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        with django_assert_num_queries(2):
+            assert TriggerSubscription.objects.has_subscribers("foo")
+            assert not TriggerSubscription.objects.has_subscribers("bar")
+        with django_assert_num_queries(0):
+            assert TriggerSubscription.objects.has_subscribers("foo")
+            assert not TriggerSubscription.objects.has_subscribers("bar")
+
+    def test_has_subscribers__django_cache(
+        self, active_subscription: TriggerSubscription, django_assert_num_queries
+    ) -> None:
+        assert TriggerSubscription.objects.has_subscribers("foo")
+        # another process (without the local cache) reads the Django cache
+        local_cache.clear()
+        with django_assert_num_queries(0):
+            assert TriggerSubscription.objects.has_subscribers("foo")
+
+    def test_has_subscribers__invalidated(
+        self, active_subscription: TriggerSubscription
+    ) -> None:
+        assert TriggerSubscription.objects.has_subscribers("foo")
+        active_subscription.pause()
+        assert not TriggerSubscription.objects.has_subscribers("foo")
+        active_subscription.resume()
+        assert TriggerSubscription.objects.has_subscribers("foo")
+        active_subscription.unsubscribe()
+        assert not TriggerSubscription.objects.has_subscribers("foo")
+        assert TriggerSubscription.objects.cached_active("foo") == []
+        TriggerSubscription.objects.subscribe(
+            user=active_subscription.user,
+            trigger="foo",
+            zap="subscription:123",
+            target_url="www.foogle.com",
+        )
+        assert TriggerSubscription.objects.has_subscribers("foo")
+
+    def test_has_subscribers__record_failure(
+        self, active_subscription: TriggerSubscription
+    ) -> None:
+        assert TriggerSubscription.objects.has_subscribers("foo")
+        TriggerSubscription.objects.all().record_failure(pause_after=1)
+        assert not TriggerSubscription.objects.has_subscribers("foo")
+
+    def test_has_subscribers__on_commit(
+        self,
+        active_subscription: TriggerSubscription,
+        django_capture_on_commit_callbacks,
+    ) -> None:
+        with django_capture_on_commit_callbacks() as callbacks:
+            active_subscription.pause()
+        assert len(callbacks) == 1
 
 
 @pytest.mark.django_db
 class TestTriggerSubscription:
+    def test_uuid__unique(self, active_subscription: TriggerSubscription) -> None:
+        active_subscription.pk = None
+        active_subscription.zap = "another-zap"
+        with pytest.raises(IntegrityError):
+            active_subscription.save()
+
     def test_unsubscribe(self, active_subscription: TriggerSubscription) -> None:
         assert active_subscription.is_active
         active_subscription.unsubscribe()
@@ -79,3 +231,47 @@ class TestTriggerEvent:
         assert event.duration is None
         event.finished_at = event.started_at + timedelta(seconds=1)
         assert event.duration == timedelta(seconds=1)
+
+
+@pytest.mark.django_db
+class TestTriggerDeliveryManager:
+    def claim(self) -> list[TriggerDelivery]:
+        return TriggerDelivery.objects.claim(
+            batch_size=10, claim_timeout=60, max_attempts=2
+        )
+
+    def test_claim(self, active_subscription: TriggerSubscription) -> None:
+        delivery = TriggerDelivery.objects.enqueue(active_subscription, {"foo": "bar"})
+        assert self.claim() == [delivery]
+        delivery.refresh_from_db()
+        assert delivery.claimed_at
+        assert delivery.attempts == 1
+        # already claimed
+        assert self.claim() == []
+
+    def test_claim__expired(self, active_subscription: TriggerSubscription) -> None:
+        delivery = TriggerDelivery.objects.enqueue(active_subscription, {"foo": "bar"})
+        assert self.claim() == [delivery]
+        TriggerDelivery.objects.update(claimed_at=tz_now() - timedelta(seconds=61))
+        assert self.claim() == [delivery]
+        TriggerDelivery.objects.update(claimed_at=tz_now() - timedelta(seconds=61))
+        # out of attempts
+        assert self.claim() == []
+
+    def test_claim__delivered(self, active_subscription: TriggerSubscription) -> None:
+        TriggerDelivery.objects.create(
+            subscription=active_subscription, event_data={}, delivered_at=tz_now()
+        )
+        assert self.claim() == []
+
+    def test_claim__inactive(self, inactive_subscription: TriggerSubscription) -> None:
+        TriggerDelivery.objects.enqueue(inactive_subscription, {"foo": "bar"})
+        assert self.claim() == []
+
+    def test_claim__paused(self, active_subscription: TriggerSubscription) -> None:
+        delivery = TriggerDelivery.objects.enqueue(active_subscription, {"foo": "bar"})
+        active_subscription.pause()
+        assert self.claim() == []
+        # held until the subscription is resumed
+        active_subscription.resume()
+        assert self.claim() == [delivery]
@@ -0,0 +1,120 @@
+import time
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from zapier.triggers.models import TriggerEvent
+from zapier.triggers.recorder import (
+    EventRecorder,
+    asave_event,
+    get_recorder,
+    save_event,
+)
+from zapier.triggers.views import TriggerView
+
+
+def new_event(user) -> TriggerEvent:
+    return TriggerEvent(user=user, trigger="foo", http_method="GET", status_code=200)
+
+
+@pytest.fixture(autouse=True)
+def process_recorder() -> None:
+    # the process-wide recorder must not leak events between tests
+    with mock.patch("zapier.triggers.recorder._recorder", None):
+        yield
+
+
+@pytest.fixture
+def recorder() -> EventRecorder:
+    return EventRecorder(max_size=2, batch_size=10, flush_interval=0.1)
+
+
+@pytest.mark.django_db
+@mock.patch.object(EventRecorder, "start")
+class TestEventRecorder:
+    def test_record(self, mock_start, recorder: EventRecorder, user) -> None:
+        event = recorder.record(new_event(user))
+        assert not event.pk
+        assert TriggerEvent.objects.count() == 0
+        recorder.flush()
+        assert TriggerEvent.objects.get().uuid == event.uuid
+
+    def test_record__full(self, mock_start, recorder: EventRecorder, user) -> None:
+        for _ in range(3):
+            recorder.record(new_event(user))
+        # the third event is saved immediately, as the queue is full
+        assert TriggerEvent.objects.count() == 1
+        recorder.flush()
+        assert TriggerEvent.objects.count() == 3
+
+    def test_get_batch(self, mock_start, recorder: EventRecorder, user) -> None:
+        recorder.batch_size = 1
+        recorder.record(new_event(user))
+        recorder.record(new_event(user))
+        assert len(recorder.get_batch(timeout=0)) == 1
+        assert len(recorder.get_batch(timeout=0)) == 1
+        assert recorder.get_batch(timeout=0) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_event_recorder__save_error(recorder: EventRecorder, user) -> None:
+    invalid = new_event(user)
+    invalid.http_method = None
+    batch = [new_event(user), invalid, new_event(user)]
+    recorder.save(batch)
+    # the batch is saved one at a time, dropping the invalid event
+    assert set(TriggerEvent.objects.values_list("uuid", flat=True)) == {
+        batch[0].uuid,
+        batch[2].uuid,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_event_recorder__thread(recorder: EventRecorder, user) -> None:
+    recorder.record(new_event(user))
+    for _ in range(50):
+        if TriggerEvent.objects.exists():
+            break
+        time.sleep(0.05)
+    assert TriggerEvent.objects.count() == 1
+    recorder.stop()
+    assert not recorder.thread.is_alive()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mode,saved", [("sync", True), ("deferred", False)])
+@mock.patch.object(EventRecorder, "start")
+def test_save_event(mock_start, user, mode: str, saved: bool) -> None:
+    with mock.patch("zapier.triggers.recorder.RECORDING_MODE", mode):
+        event = save_event(new_event(user))
+    assert bool(event.pk) == saved
+
+
+@pytest.mark.django_db
+@mock.patch.object(EventRecorder, "start")
+@mock.patch("zapier.triggers.recorder.RECORDING_MODE", "deferred")
+def test_asave_event__full(mock_start, recorder: EventRecorder, user) -> None:
+    with mock.patch("zapier.triggers.recorder._recorder", recorder):
+        for _ in range(2):
+            assert not async_to_sync(asave_event)(new_event(user)).pk
+        # the queue is full, so the event is saved (without blocking the loop)
+        assert async_to_sync(asave_event)(new_event(user)).pk
+    assert TriggerEvent.objects.count() == 1
+
+
+@pytest.mark.django_db
+@mock.patch.object(EventRecorder, "start")
+@mock.patch("zapier.triggers.recorder.RECORDING_MODE", "deferred")
+def test_trigger_view__deferred(
+    mock_start, rf: RequestFactory, active_token: Token
+) -> None:
+    url = reverse("zapier_triggers:list", kwargs={"trigger": "new_book"})
+    request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+    assert TriggerView.as_view()(request, "new_book").status_code == 200
+    assert TriggerEvent.objects.count() == 0
+    get_recorder().flush()
+    assert TriggerEvent.objects.get().trigger == "new_book"
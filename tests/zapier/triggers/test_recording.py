@@ -0,0 +1,94 @@
+from collections import defaultdict
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from zapier.triggers.event import push
+from zapier.triggers.models import TriggerSubscription
+from zapier.triggers.recording import get_recorded_data, get_recording_policy
+from zapier.triggers.views import TriggerView
+
+
+@pytest.fixture(autouse=True)
+def counters() -> None:
+    with mock.patch("zapier.triggers.recording._counters", defaultdict(int)):
+        yield
+
+
+@pytest.mark.parametrize(
+    "trigger,policy",
+    [("new_book", "full"), ("ids_book", "ids"), ("unrecorded_book", "none")],
+)
+def test_get_recording_policy(trigger: str, policy: str) -> None:
+    assert get_recording_policy(trigger) == policy
+
+
+def test_get_recording_policy__sampled() -> None:
+    policies = [get_recording_policy("sampled_book") for _ in range(4)]
+    assert policies == ["full", "metadata", "full", "metadata"]
+
+
+@mock.patch("zapier.triggers.recording.RECORDING_POLICY", "metadata")
+def test_get_recording_policy__unregistered() -> None:
+    assert get_recording_policy("foo") == "metadata"
+
+
+@pytest.mark.parametrize(
+    "policy,data,recorded",
+    [
+        ("full", [{"id": 1, "x": 2}], [{"id": 1, "x": 2}]),
+        ("ids", [{"id": 1, "x": 2}, {"x": 3}], [1, None]),
+        ("ids", {"id": 1, "x": 2}, [1]),
+        ("metadata", [{"id": 1, "x": 2}], None),
+        ("none", [{"id": 1, "x": 2}], None),
+    ],
+)
+def test_get_recorded_data(policy: str, data, recorded) -> None:
+    assert get_recorded_data("new_book", data, policy) == recorded
+
+
+@pytest.mark.django_db
+def test_trigger_view__ids(rf: RequestFactory, active_token: Token) -> None:
+    url = reverse("zapier_triggers:list", kwargs={"trigger": "ids_book"})
+    request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+    TriggerView.as_view()(request, "ids_book")
+    event = active_token.user.zapier_trigger_events.get()
+    assert event.object_count == 10
+    assert event.event_data == list(range(10))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "policy,recorded", [("ids", list(range(10))), ("metadata", None)]
+)
+@mock.patch("zapier.triggers.views.get_recording_policy")
+def test_trigger_view__stream(
+    mock_policy, rf: RequestFactory, active_token: Token, policy: str, recorded
+) -> None:
+    mock_policy.return_value = policy
+    url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+    request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+    response = TriggerView.as_view()(request, "stream_book")
+    b"".join(response.streaming_content)
+    event = active_token.user.zapier_trigger_events.get()
+    assert event.object_count == 10
+    assert event.event_data == recorded
+
+
+@pytest.mark.django_db
+@mock.patch("zapier.triggers.recording.RECORDING_POLICY", "metadata")
+@mock.patch("zapier.triggers.event.get_session")
+def test_push__metadata(
+    mock_get_session, active_subscription: TriggerSubscription
+) -> None:
+    mock_get_session.return_value.post.return_value = mock.Mock(status_code=200)
+    event = push(active_subscription, {"id": 1})
+    # the full data is sent, but only the metadata is recorded
+    assert mock_get_session.return_value.post.call_args.kwargs["data"] == b'{"id": 1}'
+    event.refresh_from_db()
+    assert event.event_data is None
+    assert event.object_count == 1
+    assert event.status_code == 200
@@ -0,0 +1,85 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from tests.settings import (
+    cursor_trigger_func,
+    sample_trigger_func,
+    version_etag_func,
+)
+from zapier.triggers.registry import TriggerRegistry, registry, trigger
+
+
+@pytest.fixture
+def triggers() -> TriggerRegistry:
+    return TriggerRegistry()
+
+
+def test_registry() -> None:
+    # the TRIGGERS setting is loaded at startup
+    assert "new_book" in registry
+    assert registry["new_book"].func == sample_trigger_func
+    assert registry["new_book"].sample_size == 3
+    assert registry["cursor_book"].func == cursor_trigger_func
+    assert registry["cursor_book"].cursor == "id"
+    assert registry["versioned_book"].etag == version_etag_func
+    assert "old_book" not in registry
+
+
+def test_register(triggers: TriggerRegistry) -> None:
+    t = triggers.register("foo", sample_trigger_func, sample_size=5)
+    assert triggers["foo"] == t
+    assert t.sample_size == 5
+    assert t.recording == "full"
+    assert list(triggers) == [t]
+    triggers.unregister("foo")
+    assert "foo" not in triggers
+
+
+@pytest.mark.parametrize(
+    "func,options",
+    [
+        (None, {}),
+        (sample_trigger_func, {"sample": 5}),
+        (sample_trigger_func, {"recording": "sometimes"}),
+        (sample_trigger_func, {"etag": "v1"}),
+    ],
+)
+def test_register__invalid(triggers: TriggerRegistry, func, options) -> None:
+    with pytest.raises(ImproperlyConfigured):
+        triggers.register("foo", func, **options)
+
+
+def test_register__duplicate(triggers: TriggerRegistry) -> None:
+    triggers.register("foo", sample_trigger_func)
+    with pytest.raises(ImproperlyConfigured):
+        triggers.register("foo", sample_trigger_func)
+
+
+def test_register_from_settings(triggers: TriggerRegistry) -> None:
+    triggers.register_from_settings()
+    assert {t.name for t in triggers} == {t.name for t in registry}
+
+
+@pytest.mark.parametrize(
+    "config",
+    ["tests.settings.missing_func", "tests.missing.func", {"cursor": "id"}],
+)
+def test_register_from_settings__invalid(triggers: TriggerRegistry, config) -> None:
+    with mock.patch.dict(
+        "zapier.triggers.settings._settings", TRIGGERS={"foo": config}
+    ):
+        with pytest.raises(ImproperlyConfigured):
+            triggers.register_from_settings()
+
+
+def test_trigger_decorator(triggers: TriggerRegistry) -> None:
+    with mock.patch("zapier.triggers.registry.registry", triggers):
+
+        @trigger("foo", stream=True)
+        def foo(request):
+            return []
+
+    assert triggers["foo"].func == foo
+    assert triggers["foo"].stream
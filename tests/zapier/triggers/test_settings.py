@@ -4,7 +4,13 @@ import pytest
 
 from tests.conftest import uf
 from tests.factories import UserFactory
-from zapier.triggers.settings import import_from_path, trigger_exists
+from tests.settings import cursor_trigger_func, sample_trigger_func
+from zapier.triggers.settings import (
+    get_trigger,
+    get_trigger_options,
+    import_from_path,
+    trigger_exists,
+)
 
 
 @pytest.mark.parametrize(
@@ -18,3 +24,15 @@ def test_import_from_path(path: str, target: Any) -> None:
 def test_trigger_exists() -> None:
     assert trigger_exists("new_book")
     assert not trigger_exists("old_book")
+
+
+def test_get_trigger() -> None:
+    assert get_trigger("new_book") == sample_trigger_func
+    assert get_trigger("cursor_book") == cursor_trigger_func
+
+
+def test_get_trigger_options() -> None:
+    assert get_trigger_options("new_book") == {
+        "func": "tests.settings.sample_trigger_func"
+    }
+    assert get_trigger_options("cursor_book")["cursor"] == "id"
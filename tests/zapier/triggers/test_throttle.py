@@ -0,0 +1,38 @@
+import logging
+from unittest import mock
+
+import pytest
+
+from zapier.triggers.throttle import TriggerThrottled, concurrency_limit, time_budget
+
+
+def test_concurrency_limit() -> None:
+    with concurrency_limit("foo", 2):
+        with concurrency_limit("foo", 2):
+            with pytest.raises(TriggerThrottled):
+                with concurrency_limit("foo", 2):
+                    pass
+            # other triggers have their own slots
+            with concurrency_limit("bar", 2):
+                pass
+        # the slot is released when the execution ends
+        with concurrency_limit("foo", 2):
+            pass
+
+
+def test_concurrency_limit__exception() -> None:
+    with pytest.raises(ValueError):
+        with concurrency_limit("foo", 1):
+            raise ValueError
+    with concurrency_limit("foo", 1):
+        pass
+
+
+@pytest.mark.parametrize("duration,warned", [(0.5, False), (1.5, True)])
+@mock.patch("zapier.triggers.throttle.time.monotonic")
+def test_time_budget(mock_monotonic, caplog, duration: float, warned: bool) -> None:
+    mock_monotonic.side_effect = [100, 100 + duration]
+    with caplog.at_level(logging.WARNING, logger="zapier.triggers.throttle"):
+        with time_budget("foo", 1):
+            pass
+    assert bool(caplog.records) == warned
@@ -1,13 +1,26 @@
+import json
+from contextlib import ExitStack
+from unittest import mock
+from uuid import uuid4
+
 import pytest
 from django.test import Client, RequestFactory
 from django.urls import reverse
 from rest_framework.authtoken.models import Token
 from rest_framework.request import Request
 
-from zapier.triggers.models import TriggerSubscription
+from zapier.triggers.cache import invalidate_trigger_cache
+from zapier.triggers.encoding import decode_json
+from zapier.triggers.models import TriggerCursor, TriggerSubscription
 from zapier.triggers.settings import get_trigger
+from zapier.triggers.throttle import THROTTLED_ERROR, concurrency_limit
 from zapier.triggers.types import TriggerData
-from zapier.triggers.views import TriggerView
+from zapier.triggers.views import (
+    StreamingContent,
+    TriggerView,
+    etag_matches,
+    limit_data,
+)
 
 
 @pytest.mark.django_db
@@ -27,6 +40,40 @@ def test_auth_check__missing(client: Client, active_token: Token) -> None:
     assert response.status_code == 401
 
 
+@pytest.mark.parametrize("limit,count", [(None, 10), (3, 3), (20, 10)])
+def test_limit_data(limit: int | None, count: int) -> None:
+    data = ({"id": i} for i in range(10))
+    assert limit_data(data, limit) == [{"id": i} for i in range(count)]
+
+
+@pytest.mark.django_db
+def test_limit_data__queryset(
+    django_assert_num_queries, active_subscription: TriggerSubscription
+) -> None:
+    qs = TriggerSubscription.objects.values("id")
+    with django_assert_num_queries(1) as ctx:
+        assert limit_data(qs, 3) == [{"id": active_subscription.id}]
+    assert "LIMIT 3" in ctx.captured_queries[0]["sql"]
+
+
+@pytest.mark.parametrize(
+    "if_none_match,matches",
+    [("", False), ('"abc"', True), ('"def", "abc"', True), ("*", True), ('"x"', False)],
+)
+def test_etag_matches(if_none_match: str, matches: bool) -> None:
+    assert etag_matches('"abc"', if_none_match) == matches
+
+
+def test_streaming_content__close() -> None:
+    # closing content that was never iterated still exits the limits
+    limits = ExitStack()
+    callback = mock.Mock()
+    limits.callback(callback)
+    content = StreamingContent(iter([b"[]"]), limits)
+    content.close()
+    callback.assert_called_once_with()
+
+
 @pytest.mark.django_db
 class TestTriggerView:
     def get_new_book_data(self, request: Request) -> TriggerData:
@@ -58,6 +105,213 @@ class TestTriggerView:
         # no event is created if there is not data returned.
         assert active_token.user.zapier_trigger_events.count() == 0
 
+    def test_get_unrecorded(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "unrecorded_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        response = view(request, "unrecorded_book")
+        assert response.status_code == 200
+        assert json.loads(response.content) == self.get_new_book_data(request)
+        assert active_token.user.zapier_trigger_events.count() == 0
+
+    def test_get_cursor(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "cursor_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        response = view(request, "cursor_book")
+        assert len(json.loads(response.content)) == 2
+        cursor = TriggerCursor.objects.get(user=active_token.user)
+        assert cursor.trigger == "cursor_book"
+        assert cursor.value == 2
+        # second poll - nothing new, cursor unchanged
+        response = view(request, "cursor_book")
+        assert json.loads(response.content) == []
+        assert TriggerCursor.objects.get_value(active_token.user, "cursor_book") == 2
+
+    def test_get_cursor__sample(self, rf: RequestFactory, active_token: Token) -> None:
+        TriggerCursor.objects.advance(active_token.user, "cursor_book", 2)
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "cursor_book"})
+        request = rf.get(
+            url, {"sample": "true"}, HTTP_AUTHORIZATION=f"Token {active_token.key}"
+        )
+        response = view(request, "cursor_book")
+        # sample requests ignore the cursor
+        assert len(json.loads(response.content)) == 2
+
+    @mock.patch("zapier.triggers.views.ADD_RESPONSE_HEADERS", True)
+    def test_get_cached(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "cached_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        response = view(request, "cached_book")
+        assert response.headers["X-Api-Trigger-Cache"] == "miss"
+        response = view(request, "cached_book")
+        assert response.headers["X-Api-Trigger-Cache"] == "hit"
+        assert json.loads(response.content) == self.get_new_book_data(request)
+        # only the uncached request is recorded
+        assert active_token.user.zapier_trigger_events.count() == 1
+        invalidate_trigger_cache("cached_book")
+        response = view(request, "cached_book")
+        assert response.headers["X-Api-Trigger-Cache"] == "miss"
+        assert active_token.user.zapier_trigger_events.count() == 2
+
+    def test_get_coalesced(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "coalesced_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        with mock.patch("zapier.triggers.views.single_flight") as mock_flight:
+            mock_flight.return_value = [{"id": 2}]
+            response = view(request, "coalesced_book")
+        assert json.loads(response.content) == [{"id": 2}]
+        # every request is recorded, even if its data was shared
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.event_data == [{"id": 2}]
+
+    def test_get_throttled(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "throttled_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        with concurrency_limit("throttled_book", 1):
+            response = view(request, "throttled_book")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+        # the throttled request is recorded
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.status_code == 429
+        assert event.error == THROTTLED_ERROR
+        assert event.event_data is None
+        assert view(request, "throttled_book").status_code == 200
+
+    def test_get_throttled__stream(
+        self, rf: RequestFactory, active_token: Token
+    ) -> None:
+        view = TriggerView.as_view()
+        trigger = "throttled_stream_book"
+        url = reverse("zapier_triggers:list", kwargs={"trigger": trigger})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        with concurrency_limit(trigger, 1):
+            assert view(request, trigger).status_code == 429
+        response = view(request, trigger)
+        assert response.streaming
+        # the slot is held until the stream has been sent
+        assert view(request, trigger).status_code == 429
+        assert len(json.loads(b"".join(response.streaming_content))) == 10
+        response = view(request, trigger)
+        assert response.streaming
+        # ... or closed without being sent
+        response.close()
+        assert view(request, trigger).streaming
+
+    def test_get_async(self, rf: RequestFactory, active_token: Token) -> None:
+        # async trigger functions can also be used by the sync view
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "async_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        response = view(request, "async_book")
+        assert len(json.loads(response.content)) == 2
+
+    def test_get_etag(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "new_book"})
+        auth = f"Token {active_token.key}"
+        response = view(rf.get(url, HTTP_AUTHORIZATION=auth), "new_book")
+        etag = response.headers["ETag"]
+        request = rf.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        response = view(request, "new_book")
+        assert response.status_code == 304
+        assert response.content == b""
+        # the unchanged data is not recorded again
+        assert active_token.user.zapier_trigger_events.count() == 1
+        request = rf.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH='"foo"')
+        assert view(request, "new_book").status_code == 200
+
+    def test_get_etag__version(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "versioned_book"})
+        auth = f"Token {active_token.key}"
+        response = view(rf.get(url, HTTP_AUTHORIZATION=auth), "versioned_book")
+        etag = response.headers["ETag"]
+        request = rf.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        with mock.patch.object(TriggerView, "get_trigger_data") as mock_data:
+            response = view(request, "versioned_book")
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        # the version token is checked before the trigger function is called
+        mock_data.assert_not_called()
+
+    @pytest.mark.parametrize("sample,count", [("true", 3), ("false", 10)])
+    def test_get_lazy(
+        self, rf: RequestFactory, active_token: Token, sample: str, count: int
+    ) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "lazy_book"})
+        request = rf.get(
+            url, {"sample": sample}, HTTP_AUTHORIZATION=f"Token {active_token.key}"
+        )
+        response = view(request, "lazy_book")
+        assert len(json.loads(response.content)) == count
+
+    def test_get_stream(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        response = view(request, "stream_book")
+        assert response.streaming
+        # nothing is recorded until the stream is consumed
+        assert not active_token.user.zapier_trigger_events.exists()
+        data = json.loads(b"".join(response.streaming_content))
+        assert data == [{"id": i, "title": f"Book {i}"} for i in range(10)]
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.event_data == data
+        assert event.object_count == 10
+        assert TriggerCursor.objects.get_value(active_token.user, "stream_book") == 9
+
+    @mock.patch("zapier.triggers.compression.COMPRESS_EVENT_DATA", True)
+    def test_get_stream__compressed(
+        self, rf: RequestFactory, active_token: Token
+    ) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        data = json.loads(b"".join(view(request, "stream_book").streaming_content))
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.event_data_compressed
+        assert event.event_data == data
+
+    @mock.patch("zapier.triggers.views.STREAM_RECORD_MAX_BYTES", 100)
+    def test_get_stream__max_bytes(
+        self, rf: RequestFactory, active_token: Token
+    ) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        data = json.loads(b"".join(view(request, "stream_book").streaming_content))
+        assert len(data) == 10
+        # the data is too large to record in full, so the ids are recorded
+        event = active_token.user.zapier_trigger_events.get()
+        assert event.event_data == list(range(10))
+        assert event.object_count == 10
+
+    @mock.patch("zapier.triggers.views.STREAM_CHUNK_SIZE", 50)
+    def test_get_stream__chunks(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+        request = rf.get(url, HTTP_AUTHORIZATION=f"Token {active_token.key}")
+        chunks = list(view(request, "stream_book").streaming_content)
+        assert len(chunks) > 1
+        assert len(json.loads(b"".join(chunks))) == 10
+
+    def test_get_stream__sample(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:list", kwargs={"trigger": "stream_book"})
+        request = rf.get(
+            url, {"sample": "true"}, HTTP_AUTHORIZATION=f"Token {active_token.key}"
+        )
+        response = view(request, "stream_book")
+        assert not response.streaming
+        assert len(json.loads(response.content)) == 3
+
     def test_post(self, rf: RequestFactory, active_token: Token) -> None:
         view = TriggerView.as_view()
         url = reverse("zapier_triggers:subscribe", kwargs={"trigger": "new_book"})
@@ -76,7 +330,55 @@ class TestTriggerView:
         assert new_subscription.zap == "subscription:123"
         assert new_subscription.target_url == "www.foogle.com"
 
-    def test_delete(
+    def test_post__reactivate(self, rf: RequestFactory, active_token: Token) -> None:
+        subscription = TriggerSubscription.objects.subscribe(
+            user=active_token.user,
+            trigger="new_book",
+            zap="subscription:123",
+            target_url="www.foogle.com",
+        )
+        subscription.unsubscribe()
+        view = TriggerView.as_view()
+        url = reverse("zapier_triggers:subscribe", kwargs={"trigger": "new_book"})
+        request = rf.post(
+            url,
+            data={"hookUrl": "www.foogle.com", "zapId": "subscription:123"},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {active_token.key}",
+        )
+        with mock.patch(
+            "zapier.triggers.views.decode_json", wraps=decode_json
+        ) as mock_decode_json:
+            response = view(request, "new_book")
+        assert response.status_code == 201
+        mock_decode_json.assert_called_once()
+        subscription = TriggerSubscription.objects.get()
+        assert subscription.is_active
+        assert json.loads(response.content) == {"id": str(subscription.uuid)}
+
+    def test_delete(self, rf: RequestFactory, active_token: Token) -> None:
+        subscription = TriggerSubscription.objects.subscribe(
+            user=active_token.user,
+            trigger="new_book",
+            zap="subscription:123",
+            target_url="www.foogle.com",
+        )
+        view = TriggerView.as_view()
+        url = reverse(
+            "zapier_triggers:unsubscribe",
+            kwargs={"trigger": "new_book", "subscription_id": subscription.uuid},
+        )
+        request = rf.delete(
+            url,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {active_token.key}",
+        )
+        response = view(request, "new_book", subscription.uuid)
+        assert response.status_code == 204
+        subscription.refresh_from_db()
+        assert subscription.is_inactive
+
+    def test_delete__other_trigger(
         self,
         rf: RequestFactory,
         active_token: Token,
@@ -93,6 +395,21 @@ class TestTriggerView:
             HTTP_AUTHORIZATION=f"Token {active_token.key}",
         )
         response = view(request, "new_book", active_subscription.uuid)
-        assert response.status_code == 204
+        assert response.status_code == 404
         active_subscription.refresh_from_db()
-        assert active_subscription.is_inactive
+        assert active_subscription.is_active
+
+    def test_delete__not_found(self, rf: RequestFactory, active_token: Token) -> None:
+        view = TriggerView.as_view()
+        subscription_id = uuid4()
+        url = reverse(
+            "zapier_triggers:unsubscribe",
+            kwargs={"trigger": "new_book", "subscription_id": subscription_id},
+        )
+        request = rf.delete(
+            url,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {active_token.key}",
+        )
+        response = view(request, "new_book", subscription_id)
+        assert response.status_code == 404
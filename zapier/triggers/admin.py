@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import json
 import logging
 
 from django.contrib import admin
-from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.html import format_html, mark_safe
 
-from .models import TriggerEvent, TriggerSubscription
+from .encoding import encode_json
+from .models import TriggerCursor, TriggerDelivery, TriggerEvent, TriggerSubscription
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +20,7 @@ def format_json_for_admin(data: dict) -> str:
     someone builds a custom syntax function.
 
     """
-    pretty = json.dumps(
-        data, cls=DjangoJSONEncoder, sort_keys=True, indent=4, separators=(",", ": ")
-    )
+    pretty = encode_json(data, pretty=True).decode()
     # https://docs.djangoproject.com/en/1.11/ref/utils/#django.utils.html.format_html
     # this is a fudge to get around the fact that we cannot put a <pre> inside a <p>,
     # but we want the <p> formatting (.align CSS). We can either use a <pre> and an
@@ -43,6 +40,10 @@ class TriggerSubscriptionAdmin(admin.ModelAdmin):
         "target_url",
         "subscribed_at",
         "unsubscribed_at",
+        "paused_at",
+        "consecutive_failures",
+        "last_success_at",
+        "last_failure_at",
         "uuid",
     )
 
@@ -72,6 +73,8 @@ class TriggerEventAdmin(admin.ModelAdmin):
         "duration",
         "subscription",
         "status_code",
+        "attempt",
+        "error",
         "_event_data",
         "object_count",
     )
@@ -85,3 +88,40 @@ class TriggerEventAdmin(admin.ModelAdmin):
     @admin.display(description="Event data")
     def _event_data(self, obj: TriggerEvent) -> str:
         return format_json_for_admin(obj.event_data)
+
+
+@admin.register(TriggerDelivery)
+class TriggerDeliveryAdmin(admin.ModelAdmin):
+    list_display = (
+        "subscription",
+        "created_at",
+        "claimed_at",
+        "attempts",
+        "_is_delivered",
+    )
+    readonly_fields = (
+        "uuid",
+        "subscription",
+        "created_at",
+        "claimed_at",
+        "attempts",
+        "delivered_at",
+        "_event_data",
+    )
+    exclude = ("event_data",)
+    raw_id_fields = ("subscription",)
+
+    @admin.display(boolean=True)
+    def _is_delivered(self, obj: TriggerDelivery) -> bool:
+        return obj.is_delivered
+
+    @admin.display(description="Event data")
+    def _event_data(self, obj: TriggerDelivery) -> str:
+        return format_json_for_admin(obj.event_data)
+
+
+@admin.register(TriggerCursor)
+class TriggerCursorAdmin(admin.ModelAdmin):
+    list_display = ("user", "trigger", "value", "updated_at")
+    readonly_fields = ("user", "trigger", "value", "updated_at")
+    raw_id_fields = ("user",)
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class ZapierTriggerConfig(AppConfig):
@@ -6,3 +7,11 @@ class ZapierTriggerConfig(AppConfig):
     label = "zapier_triggers"
     verbose_name = "Zapier Triggers"
     default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self) -> None:
+        from .registry import registry
+
+        # resolve all of the trigger functions at startup, so that any
+        # misconfiguration fails now, and not when Zapier first polls
+        registry.register_from_settings()
+        autodiscover_modules("triggers")
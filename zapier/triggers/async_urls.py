@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from .async_views import AsyncTriggerView
+from .views import auth_check
+
+app_name = "zapier_triggers"
+
+# the async view is csrf exempt, as DRF views are (they use token auth)
+trigger_view = csrf_exempt(AsyncTriggerView.as_view())
+
+urlpatterns = [
+    # GET - the auth check URL
+    path("auth/", auth_check, name="auth_check"),
+    # GET - the "list" trigger endpoint
+    path("<str:trigger>/", trigger_view, name="list"),
+    # POST - the "subscribe" endpoint
+    path("<str:trigger>/subscriptions/", trigger_view, name="subscribe"),
+    # DELETE - "unsubscribe" endpoint
+    path(
+        "<str:trigger>/subscriptions/<uuid:subscription_id>/",
+        trigger_view,
+        name="unsubscribe",
+    ),
+]
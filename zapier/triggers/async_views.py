@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import logging
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Iterable, cast
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+)
+from django.utils.timezone import now as tz_now
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .cache import aget_cached_data, aset_cached_data
+from .models import TriggerCursor, TriggerEvent
+from .permissions import IsZapier
+from .recorder import asave_event
+from .recording import get_recorded_data, get_recording_policy
+from .registry import registry
+from .response import JsonResponse
+from .settings import ADD_RESPONSE_HEADERS
+from .throttle import time_budget
+from .types import AsyncTriggerViewFunc, TriggerData
+from .views import AUTHENTICATOR, TriggerView, etag_matches, limit_data, make_etag
+
+logger = logging.getLogger(__name__)
+
+# the sync view, which handles all requests that can't be handled natively
+sync_trigger_view = TriggerView.as_view()
+
+
+class AsyncTriggerView(View):
+    """
+    Async version of TriggerView, for use with an ASGI server.
+
+    Polling requests for triggers with an async function are handled
+    natively - the trigger function is awaited, and the cursor, cache and
+    TriggerEvent are read and written using the async ORM and cache APIs.
+
+    Everything else - sync trigger functions (which must run in a thread
+    anyway), triggers configured to `stream`, `coalesce` or with a
+    `max_concurrency`, unknown triggers, and subscribe / unsubscribe
+    requests - is handed to the sync TriggerView, which is run in a
+    thread.
+
+    """
+
+    # TriggerView provides all of the request-level helpers
+    helper = TriggerView()
+
+    def is_async_request(self, trigger: str) -> bool:
+        """Return True if the trigger can be handled natively."""
+        options = registry[trigger]
+        if not options.is_async:
+            return False
+        return not (options.stream or options.coalesce or options.max_concurrency)
+
+    async def authenticate(self, request: HttpRequest) -> Request | HttpResponse:
+        """
+        Authenticate the request, returning a DRF Request (or error response).
+
+        DRF authenticators are sync (and usually hit the database), so the
+        authentication is run in a thread.
+
+        """
+        drf_request = Request(request, authenticators=[AUTHENTICATOR()])
+        try:
+            user = await sync_to_async(lambda: drf_request.user)()
+        except APIException as ex:
+            return JsonResponse({"detail": str(ex.detail)}, status=ex.status_code)
+        if not (user and user.is_authenticated):
+            return JsonResponse({"detail": "Not authenticated."}, status=401)
+        if not IsZapier().has_permission(drf_request, self):
+            return JsonResponse({"detail": "Permission denied."}, status=403)
+        return drf_request
+
+    async def prepare_request(self, request: Request, trigger: str) -> None:
+        """Set the trigger attributes - see TriggerView.prepare_request."""
+        request.trigger_limit = self.helper.get_limit(request, trigger)
+        request.trigger_cursor = None
+        if self.helper.get_cursor_field(request, trigger):
+            request.trigger_cursor = await TriggerCursor.objects.aget_value(
+                request.user, trigger
+            )
+
+    async def get_version_etag(self, request: Request, trigger: str) -> str | None:
+        """Return the version ETag - see TriggerView.get_version_etag."""
+        if not registry[trigger].etag:
+            return None
+        return await sync_to_async(self.helper.get_version_etag)(request, trigger)
+
+    async def fetch_trigger_data(self, request: Request, trigger: str) -> TriggerData:
+        """Await the trigger function, and advance the cursor."""
+        options = registry[trigger]
+        with ExitStack() as stack:
+            if options.time_budget:
+                stack.enter_context(time_budget(trigger, options.time_budget))
+            data: Iterable[dict] = await cast(AsyncTriggerViewFunc, options.func)(
+                request
+            )
+            if isinstance(data, QuerySet):
+                data = await sync_to_async(limit_data)(data, request.trigger_limit)
+            else:
+                data = limit_data(data, request.trigger_limit)
+        value = self.helper.get_cursor_value(request, trigger, data)
+        if value is not None:
+            await TriggerCursor.objects.aadvance(request.user, trigger, value)
+        return data
+
+    async def get_trigger_data(self, request: Request, trigger: str) -> TriggerData:
+        """Return the trigger data, from the cache if it is configured."""
+        request.trigger_cache_hit = False
+        if not (ttl := registry[trigger].cache_ttl):
+            return await self.fetch_trigger_data(request, trigger)
+        key = await sync_to_async(self.helper.get_trigger_key)(request, trigger)
+        if (data := await aget_cached_data(key)) is not None:
+            request.trigger_cache_hit = True
+            return data
+        data = await self.fetch_trigger_data(request, trigger)
+        await aset_cached_data(key, data, ttl)
+        return data
+
+    async def get(self, request: HttpRequest, trigger: str) -> HttpResponse:
+        """Fetch trigger data - see TriggerView.get."""
+        # unknown triggers are handed off too, as the request must be
+        # authenticated before revealing whether the trigger exists
+        if trigger not in registry or not self.is_async_request(trigger):
+            return await sync_to_async(sync_trigger_view)(request, trigger=trigger)
+        logger.debug("Fetching data for '%s' trigger (async).", trigger)
+        drf_request = await self.authenticate(request)
+        if isinstance(drf_request, HttpResponse):
+            return drf_request
+        started_at = tz_now()
+        await self.prepare_request(drf_request, trigger)
+        if_none_match = request.headers.get("If-None-Match", "")
+        etag = await self.get_version_etag(drf_request, trigger)
+        if etag and etag_matches(etag, if_none_match):
+            return HttpResponseNotModified(headers={"ETag": etag})
+        event_data = await self.get_trigger_data(drf_request, trigger)
+        response = JsonResponse(data=event_data, status=200, safe=False)
+        etag = etag or make_etag(response.content)
+        if etag_matches(etag, if_none_match):
+            return HttpResponseNotModified(headers={"ETag": etag})
+        response["ETag"] = etag
+        if ADD_RESPONSE_HEADERS and registry[trigger].cache_ttl:
+            response["X-Api-Trigger-Cache"] = (
+                "hit" if drf_request.trigger_cache_hit else "miss"
+            )
+        event = await self.record_trigger_data(
+            drf_request, trigger, event_data, started_at
+        )
+        if event and ADD_RESPONSE_HEADERS:
+            response["X-Api-Trigger-Count"] = len(event_data)
+            response["X-Api-Trigger-Event"] = event.uuid
+        return response
+
+    async def record_trigger_data(
+        self,
+        request: Request,
+        trigger: str,
+        event_data: TriggerData,
+        started_at: datetime,
+    ) -> TriggerEvent | None:
+        """Record the data returned - see TriggerView.record_trigger_data."""
+        if not event_data or request.trigger_cache_hit:
+            return None
+        if not self.helper.is_recorded_request(request, trigger):
+            return None
+        policy = get_recording_policy(trigger)
+        return await asave_event(
+            TriggerEvent(
+                user=request.user,
+                trigger=trigger,
+                event_data=get_recorded_data(trigger, event_data, policy),
+                object_count=len(event_data),
+                http_method="GET",
+                started_at=started_at,
+                finished_at=tz_now(),
+                status_code=200,
+            )
+        )
+
+    async def post(self, request: HttpRequest, trigger: str) -> HttpResponse:
+        """Subscribe - see TriggerView.post."""
+        return await sync_to_async(sync_trigger_view)(request, trigger=trigger)
+
+    async def delete(
+        self, request: HttpRequest, trigger: str, subscription_id: Any
+    ) -> HttpResponse:
+        """Unsubscribe - see TriggerView.delete."""
+        return await sync_to_async(sync_trigger_view)(
+            request, trigger=trigger, subscription_id=subscription_id
+        )
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+from .encoding import encode_json
+from .settings import get_setting
+from .types import TriggerData
+
+logger = logging.getLogger(__name__)
+
+# the Django cache used to store polling trigger data
+CACHE_ALIAS = get_setting("CACHE_ALIAS")
+
+# seconds that active subscriptions are cached in the Django cache
+SUBSCRIPTION_CACHE_TIMEOUT = get_setting("SUBSCRIPTION_CACHE_TIMEOUT")
+
+# seconds that active subscriptions are cached in process memory
+SUBSCRIPTION_LOCAL_TTL = get_setting("SUBSCRIPTION_LOCAL_TTL")
+
+# max number of entries cached in process memory
+SUBSCRIPTION_LOCAL_MAX_SIZE = get_setting("SUBSCRIPTION_LOCAL_MAX_SIZE")
+
+KEY_PREFIX = "zapier_triggers"
+
+T = TypeVar("T")
+
+
+def get_cache() -> BaseCache:
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(trigger: str, user_id: Any = None) -> str:
+    if user_id is None:
+        return f"{KEY_PREFIX}:version:{trigger}"
+    return f"{KEY_PREFIX}:version:{trigger}:{user_id}"
+
+
+def _bump_version(key: str) -> None:
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # the key does not exist (yet)
+        cache.set(key, 1, timeout=None)
+
+
+def get_cache_key(
+    trigger: str, user: AbstractBaseUser, *, sample: bool, cursor: Any
+) -> str:
+    """
+    Return the cache key for the trigger data returned to a user.
+
+    The key includes the current trigger and user versions, so that bumping
+    either version (see `invalidate_trigger_cache`) orphans all of the
+    existing keys, which then expire. The cursor value is hashed as it may
+    be any JSON-serializable value.
+
+    """
+    trigger_key, user_key = _version_key(trigger), _version_key(trigger, user.pk)
+    versions = get_cache().get_many([trigger_key, user_key])
+    token = hashlib.blake2b(encode_json([sample, cursor]), digest_size=8).hexdigest()
+    return ":".join(
+        [
+            KEY_PREFIX,
+            "data",
+            trigger,
+            str(versions.get(trigger_key, 0)),
+            str(versions.get(user_key, 0)),
+            str(user.pk),
+            token,
+        ]
+    )
+
+
+def get_cached_data(key: str) -> TriggerData | None:
+    """Return the cached trigger data, or None if it is not cached."""
+    return get_cache().get(key)
+
+
+def set_cached_data(key: str, data: TriggerData, ttl: int) -> None:
+    """Cache trigger data for `ttl` seconds."""
+    get_cache().set(key, data, timeout=ttl)
+
+
+async def aget_cached_data(key: str) -> TriggerData | None:
+    return await get_cache().aget(key)
+
+
+async def aset_cached_data(key: str, data: TriggerData, ttl: int) -> None:
+    await get_cache().aset(key, data, timeout=ttl)
+
+
+def invalidate_trigger_cache(
+    trigger: str, user: AbstractBaseUser | None = None
+) -> None:
+    """
+    Invalidate the cached data for a trigger.
+
+    If a user is passed then only that user's data is invalidated, else
+    the data for all users is invalidated. Call this whenever the data
+    returned by the trigger function changes, e.g. from a post_save signal
+    receiver:
+
+        @receiver(post_save, sender=Book)
+        def invalidate_new_book(sender, instance, **kwargs):
+            invalidate_trigger_cache("new_book")
+
+    """
+    _bump_version(_version_key(trigger, user.pk if user else None))
+    logger.debug("Invalidated cached data for '%s' trigger.", trigger)
+
+
+class LocalCache:
+    """
+    A thread-safe, process-local LRU cache whose entries expire after `ttl`.
+
+    This is used in front of the Django cache for values that are read on
+    every push, where even a cache round trip is worth avoiding.
+
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return (True, value) if the key is cached, else (False, None)."""
+        with self.lock:
+            if (entry := self.entries.get(key)) is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache(
+    max_size=SUBSCRIPTION_LOCAL_MAX_SIZE, ttl=SUBSCRIPTION_LOCAL_TTL
+)
+
+
+def _subscriptions_key(trigger: str, name: str) -> str:
+    return f"{KEY_PREFIX}:{name}:{trigger}"
+
+
+def get_cached_subscriptions(trigger: str, name: str, fetch: Callable[[], T]) -> T:
+    """
+    Return a cached subscription lookup for a trigger.
+
+    The value is read from the process-local cache, then the Django cache,
+    and only if neither has it is `fetch` called (and the result cached
+    in both). The local cache is not shared, so other processes may see
+    a stale value for up to SUBSCRIPTION_LOCAL_TTL seconds after the
+    subscriptions change.
+
+    """
+    key = _subscriptions_key(trigger, name)
+    hit, value = local_cache.get(key)
+    if hit:
+        return value
+    cache = get_cache()
+    # the cached value may be falsy (e.g. no subscribers), so use a sentinel
+    missing = object()
+    if (value := cache.get(key, missing)) is missing:
+        value = fetch()
+        cache.set(key, value, timeout=SUBSCRIPTION_CACHE_TIMEOUT)
+    local_cache.set(key, value)
+    return value
+
+
+def _delete_subscriptions(trigger: str) -> None:
+    keys = [_subscriptions_key(trigger, n) for n in ("subscriptions", "subscribed")]
+    local_cache.delete(*keys)
+    get_cache().delete_many(keys)
+
+
+def invalidate_subscriptions(trigger: str) -> None:
+    """
+    Invalidate the cached active subscriptions for a trigger.
+
+    This is called whenever a subscription is saved or deleted. Inside a
+    transaction the cache is invalidated both immediately and again on
+    commit, as another process could cache the old subscriptions before
+    the transaction commits.
+
+    """
+    _delete_subscriptions(trigger)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(_delete_subscriptions, trigger))
+    logger.debug("Invalidated cached subscriptions for '%s' trigger.", trigger)
+
+
+os.register_at_fork(after_in_child=local_cache.clear)
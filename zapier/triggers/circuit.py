@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# number of consecutive failures that opens the circuit for a host
+THRESHOLD = get_setting("CIRCUIT_BREAKER_THRESHOLD")
+
+# seconds that an open circuit fails fast before allowing a trial request
+RESET_TIMEOUT = get_setting("CIRCUIT_BREAKER_TIMEOUT")
+
+
+class CircuitBreaker:
+    """
+    Process-local circuit breaker for a single webhook host.
+
+    The circuit opens after THRESHOLD consecutive failures, and while it
+    is open requests to the host fail fast. Once RESET_TIMEOUT seconds
+    have passed a single trial request is let through ("half-open") - if
+    it succeeds the circuit closes, if it fails the circuit stays open
+    for another RESET_TIMEOUT seconds.
+
+    """
+
+    def __init__(self, host: str, threshold: int, reset_timeout: float) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"Circuit breaker for '{self.host}'"
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow_request(self) -> bool:
+        """Return True if a request can be made to the host."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # half-open - let this request through, and hold all others
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("%s closed.", self)
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning("%s opened.", self)
+                self.opened_at = time.monotonic()
+
+
+_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """Return the circuit breaker for the host of the URL."""
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host, THRESHOLD, RESET_TIMEOUT)
+        return _breakers[host]
+
+
+def reset_circuit_breakers() -> None:
+    """Remove all circuit breakers (closing all circuits)."""
+    with _lock:
+        _breakers.clear()
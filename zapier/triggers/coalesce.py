@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, TypeVar
+
+from .cache import get_cache
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# max seconds to wait for an in-flight computation (also the lock timeout)
+TIMEOUT = get_setting("COALESCE_TIMEOUT")
+
+# seconds between checks for the result of another process's computation
+POLL_INTERVAL = get_setting("COALESCE_POLL_INTERVAL")
+
+_lock = threading.Lock()
+_in_flight: dict[str, Future] = {}
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def _result_key(key: str, token: str) -> str:
+    return f"{key}:result:{token}"
+
+
+def _wait_for_result(key: str, token: str, timeout: float) -> tuple[bool, object]:
+    """Wait for the result of another process's computation."""
+    cache = get_cache()
+    deadline = time.monotonic() + timeout
+    sentinel = object()
+    while time.monotonic() < deadline:
+        result = cache.get(_result_key(key, token), sentinel)
+        if result is not sentinel:
+            return True, result
+        if cache.get(_lock_key(key)) != token:
+            # the computation finished without a result, or its lock expired
+            break
+        time.sleep(POLL_INTERVAL)
+    return False, None
+
+
+def _single_flight_across_processes(
+    key: str, func: Callable[[], T], timeout: float
+) -> T:
+    """
+    Run func once across all processes that share the cache.
+
+    The first process to add the lock key runs the function, and stores
+    the result against the (random) token in the lock, so that processes
+    waiting on that lock only ever see the result of that computation.
+    If the computation fails, or takes longer than the timeout, waiting
+    processes run the function themselves.
+
+    """
+    cache = get_cache()
+    token = uuid.uuid4().hex
+    if not cache.add(_lock_key(key), token, timeout=timeout):
+        if in_flight_token := cache.get(_lock_key(key)):
+            found, result = _wait_for_result(key, in_flight_token, timeout)
+            if found:
+                logger.debug("Coalesced request for '%s'.", key)
+                return result  # type: ignore[return-value]
+        return func()
+    try:
+        result = func()
+        cache.set(_result_key(key, token), result, timeout=timeout)
+        return result
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def single_flight(key: str, func: Callable[[], T], timeout: float | None = None) -> T:
+    """
+    Run func once for all concurrent callers with the same key.
+
+    Threads in the same process wait on the in-flight computation (and
+    see its exception if it fails); only the thread that starts the
+    computation coordinates with other processes (via the cache). If
+    the computation takes longer than the timeout, the waiting callers
+    run the function themselves.
+
+    """
+    timeout = timeout or TIMEOUT
+    with _lock:
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if future is None:
+            future = _in_flight[key] = Future()
+    if not is_leader:
+        logger.debug("Coalesced request for '%s'.", key)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return func()
+    try:
+        result = _single_flight_across_processes(key, func, timeout)
+    except BaseException as ex:
+        future.set_exception(ex)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _lock:
+            del _in_flight[key]
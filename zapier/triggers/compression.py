@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+import os
+import zlib
+from typing import Iterable
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# set to True to store new event data compressed
+COMPRESS_EVENT_DATA = get_setting("COMPRESS_EVENT_DATA")
+
+# zlib compression level (1-9)
+COMPRESSION_LEVEL = get_setting("COMPRESSION_LEVEL")
+
+# max size of a zlib preset dictionary (the size of the zlib window)
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# zlib header flag set when the stream was compressed with a dictionary
+FDICT = 0x20
+
+
+def load_dictionary(trigger: str, value: bytes | str | os.PathLike) -> bytes:
+    """Return a dictionary configured as bytes, or as the path to a file."""
+    if isinstance(value, bytes):
+        return value
+    try:
+        with open(value, "rb") as f:
+            return f.read()
+    except OSError as ex:
+        raise ImproperlyConfigured(
+            f"Unable to read '{trigger}' compression dictionary: {ex}"
+        ) from ex
+
+
+# map of trigger: preset dictionary
+DICTIONARIES = {
+    trigger: load_dictionary(trigger, value)
+    for trigger, value in get_setting("COMPRESSION_DICTIONARIES").items()
+}
+
+# map of dictionary id (the adler32 checksum in the zlib header): dictionary
+_dictionaries_by_id = {zlib.adler32(d): d for d in DICTIONARIES.values()}
+
+
+def compress(data: bytes, trigger: str) -> bytes:
+    """
+    Compress encoded JSON, using the trigger's dictionary if it has one.
+
+    A zlib stream compressed with a preset dictionary records the id of
+    the dictionary in its header, so the compressed data is all that is
+    needed to decompress it - as long as the dictionary is still
+    configured.
+
+    """
+    if zdict := DICTIONARIES.get(trigger):
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes | memoryview) -> bytes:
+    """Decompress data returned by compress."""
+    header = bytes(data[:6])
+    if len(header) < 2 or not header[1] & FDICT:
+        return zlib.decompress(data)
+    dictionary_id = int.from_bytes(header[2:6], "big")
+    if (zdict := _dictionaries_by_id.get(dictionary_id)) is None:
+        raise ValueError(f"Compression dictionary {dictionary_id} is not configured.")
+    decompressor = zlib.decompressobj(zdict=zdict)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def build_dictionary(
+    samples: Iterable[bytes], size: int = MAX_DICTIONARY_SIZE
+) -> bytes:
+    """
+    Build a zlib preset dictionary from sample payloads.
+
+    zlib matches strings against the dictionary as if it preceded the
+    data, so a dictionary is simply content similar to what will be
+    compressed - here the (distinct) samples, joined, truncated to the
+    last `size` bytes. Pass the samples oldest first, as strings nearer
+    the end of the dictionary are cheaper to reference.
+
+    """
+    distinct = dict.fromkeys(samples)
+    return b"".join(distinct)[-size:]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from functools import cache
+from typing import Any
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .settings import get_setting, import_from_path
+
+
+class StdlibJSONBackend:
+    """Encode JSON using the stdlib json module, and DjangoJSONEncoder."""
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(
+                data,
+                cls=DjangoJSONEncoder,
+                sort_keys=True,
+                indent=4,
+                separators=(",", ": "),
+            ).encode()
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    """
+    Encode JSON using orjson (must be installed separately).
+
+    Datetimes, dates and times are passed through to DjangoJSONEncoder,
+    along with anything else orjson cannot serialize natively (Decimal,
+    timedelta, lazy strings), so that values are encoded in exactly the
+    same way as they are by StdlibJSONBackend. The output is compact, and
+    pretty output is indented by two spaces (the only indent supported).
+
+    """
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as ex:
+            raise ImproperlyConfigured("OrjsonBackend requires orjson.") from ex
+        self.orjson = orjson
+        self.encoder = DjangoJSONEncoder()
+        self.options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        options = self.options
+        if pretty:
+            options |= self.orjson.OPT_INDENT_2 | self.orjson.OPT_SORT_KEYS
+        return self.orjson.dumps(data, default=self.encoder.default, option=options)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self.orjson.loads(data)
+
+
+@cache
+def get_json_backend() -> StdlibJSONBackend | OrjsonBackend:
+    """Return the backend configured by the JSON_BACKEND setting."""
+    return import_from_path(get_setting("JSON_BACKEND"))()
+
+
+def encode_json(data: Any, pretty: bool = False) -> bytes:
+    """Encode data as JSON bytes (datetimes, UUIDs, Decimals etc. supported)."""
+    return get_json_backend().dumps(data, pretty=pretty)
+
+
+def decode_json(data: bytes | str) -> Any:
+    """Decode JSON (raises ValueError if the data is not valid JSON)."""
+    return get_json_backend().loads(data)
@@ -1,29 +1,557 @@
+from __future__ import annotations
+
+import asyncio
 import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator
 
-import requests
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
 from django.utils.timezone import now as tz_now
+from requests.exceptions import RequestException
 
-from .models import TriggerEvent, TriggerSubscription
+from .circuit import get_circuit_breaker
+from .encoding import encode_json
+from .fields import get_encoded_value, set_encoded_value
+from .http import get_async_client, get_session
+from .models import TriggerDelivery, TriggerEvent, TriggerSubscription
+from .recording import get_recorded_data, get_recording_policy
 from .settings import get_setting
+from .types import LazyPushData, PushData, TriggerData
 
 logger = logging.getLogger(__name__)
 
 TIMEOUT = get_setting("REQUESTS_TIMEOUT")
 
+# max number of concurrent HTTP requests made by push_many
+PUSH_MAX_WORKERS = get_setting("PUSH_MAX_WORKERS")
 
-def push(subscription: TriggerSubscription, event_data: dict) -> TriggerEvent:
-    """Push data to Zapier."""
-    logger.debug("Pushing webhook data:\n%s", event_data)
-    started_at = tz_now()
-    response = requests.post(subscription.target_url, json=event_data, timeout=TIMEOUT)
-    finished_at = tz_now()
-    return TriggerEvent.objects.create(
-        user=subscription.user,
+# number of times a failed POST is retried, and the backoff (seconds)
+PUSH_RETRIES = get_setting("PUSH_RETRIES")
+PUSH_RETRY_BACKOFF = get_setting("PUSH_RETRY_BACKOFF")
+PUSH_RETRY_BACKOFF_MAX = get_setting("PUSH_RETRY_BACKOFF_MAX")
+
+# number of consecutive failed pushes after which a subscription is paused
+PAUSE_AFTER_FAILURES = get_setting("PAUSE_AFTER_FAILURES")
+
+# error recorded on events that failed fast without making a request
+CIRCUIT_OPEN_ERROR = "Circuit breaker is open."
+
+# max number of objects, and bytes, pushed in a single request by push_batched
+PUSH_BATCH_MAX_OBJECTS = get_setting("PUSH_BATCH_MAX_OBJECTS")
+PUSH_BATCH_MAX_BYTES = get_setting("PUSH_BATCH_MAX_BYTES")
+
+# number of events written per INSERT by push_many
+BULK_CREATE_BATCH_SIZE = get_setting("BULK_CREATE_BATCH_SIZE")
+
+
+@dataclass
+class PushResult:
+    """The final event of each push in a fan-out, and how long it took."""
+
+    events: list[TriggerEvent]
+    started_at: datetime
+    finished_at: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        return self.finished_at - self.started_at
+
+
+def _new_event(
+    subscription: TriggerSubscription,
+    event_data: PushData,
+    encoded: bytes | None = None,
+    **kwargs: Any,
+) -> TriggerEvent:
+    """
+    Return an unsaved POST event for the subscription.
+
+    The event data is encoded (unless `encoded` is passed in) and the
+    JSON is attached to the event, where it is used both as the request
+    body and as the value stored in the event_data column.
+
+    """
+    event = TriggerEvent(
+        user_id=subscription.user_id,
         trigger=subscription.trigger,
         subscription=subscription,
-        started_at=started_at,
-        finished_at=finished_at,
         http_method="POST",
-        event_data=event_data,
-        status_code=response.status_code,
+        object_count=len(event_data) if isinstance(event_data, list) else 1,
+        **kwargs,
+    )
+    if encoded is None:
+        encoded = encode_json(event_data)
+    set_encoded_value(event, "event_data", event_data, encoded)
+    return event
+
+
+def batch_objects(
+    objects: Iterable[dict],
+    max_objects: int | None = None,
+    max_bytes: int | None = None,
+) -> Iterator[tuple[TriggerData, bytes]]:
+    """
+    Split objects into batches to be pushed as a single JSON array.
+
+    Each batch contains at most `max_objects` objects, and its encoded
+    size is at most `max_bytes` - unless a single object is larger than
+    that, in which case it is sent in a batch on its own. Each object is
+    encoded once, and the batch JSON is joined from the encoded objects,
+    so each batch is yielded together with its encoded form.
+
+    """
+    max_objects = max_objects or PUSH_BATCH_MAX_OBJECTS
+    max_bytes = max_bytes or PUSH_BATCH_MAX_BYTES
+    batch: TriggerData = []
+    chunks: list[bytes] = []
+    # encoded size of the batch, starting with the enclosing "[]"
+    size = 2
+    for obj in objects:
+        chunk = encode_json(obj)
+        # objects after the first are preceded by a ", " separator
+        if batch and (len(batch) >= max_objects or size + 2 + len(chunk) > max_bytes):
+            yield batch, b"[" + b", ".join(chunks) + b"]"
+            batch, chunks, size = [], [], 2
+        size += len(chunk) + (2 if batch else 0)
+        batch.append(obj)
+        chunks.append(chunk)
+    if batch:
+        yield batch, b"[" + b", ".join(chunks) + b"]"
+
+
+def _backoff(attempt: int) -> float:
+    """Return seconds to wait after a failed attempt (exponential, full jitter)."""
+    ceiling = min(PUSH_RETRY_BACKOFF_MAX, PUSH_RETRY_BACKOFF * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)  # noqa: S311
+
+
+def _retry_event(event: TriggerEvent, attempt: int) -> TriggerEvent:
+    """Return a new (unsaved) event for the next attempt of a push."""
+    return _new_event(
+        event.subscription,
+        event.event_data,
+        get_encoded_value(event, "event_data"),
+        uuid=event.uuid,
+        attempt=attempt,
+    )
+
+
+def _fail_fast(event: TriggerEvent) -> TriggerEvent:
+    """Record an attempt that was not made because the circuit is open."""
+    event.started_at = event.finished_at = tz_now()
+    event.error = CIRCUIT_OPEN_ERROR
+    return event
+
+
+def _attempt(event: TriggerEvent) -> TriggerEvent:
+    """Make a single POST request, recording the response (or error) on the event."""
+    event.started_at = tz_now()
+    try:
+        response = get_session().post(
+            event.subscription.target_url,
+            data=get_encoded_value(event, "event_data"),
+            headers={"Content-Type": "application/json"},
+            timeout=TIMEOUT,
+        )
+    except RequestException as ex:
+        logger.warning("Error pushing data to %s: %r", event.subscription, ex)
+        event.error = repr(ex)[:255]
+    else:
+        event.status_code = response.status_code
+    event.finished_at = tz_now()
+    return event
+
+
+def _post(event: TriggerEvent) -> list[TriggerEvent]:
+    """
+    POST the event data to the subscription target_url, with retries.
+
+    Failed attempts (no response, 429, 5xx) are retried up to PUSH_RETRIES
+    times with exponential backoff, unless the circuit breaker for the
+    target host is open, in which case the attempt fails fast without
+    making a request. Every attempt is returned as a separate event -
+    the last one is the final outcome.
+
+    This function is run inside the push_many thread pool, so it must
+    not touch the database - the events are returned unsaved.
+
+    """
+    breaker = get_circuit_breaker(event.subscription.target_url)
+    attempts: list[TriggerEvent] = []
+    for attempt in range(1, PUSH_RETRIES + 2):
+        if attempt > 1:
+            time.sleep(_backoff(attempt - 1))
+            event = _retry_event(event, attempt)
+        if not breaker.allow_request():
+            attempts.append(_fail_fast(event))
+            break
+        attempts.append(_attempt(event))
+        if not event.is_retryable:
+            breaker.record_success()
+            break
+        breaker.record_failure()
+    return attempts
+
+
+def _settle_outcomes(
+    events: list[TriggerEvent],
+) -> tuple[dict[int, TriggerSubscription], set[int], set[int]]:
+    """
+    Return the subscriptions gone, and the ids of those failed / succeeded.
+
+    A subscription may have more than one push in the events (e.g. a
+    batched push), so each subscription is settled by its worst outcome
+    - a 410, then a failure, then a success. Pushes that failed fast
+    because the circuit was open say nothing about the subscription
+    itself, and are ignored.
+
+    """
+    gone: dict[int, TriggerSubscription] = {}
+    failed: set[int] = set()
+    succeeded: set[int] = set()
+    for event in events:
+        if event.is_gone:
+            gone[event.subscription_id] = event.subscription
+        elif event.is_success:
+            succeeded.add(event.subscription_id)
+        elif event.error != CIRCUIT_OPEN_ERROR:
+            failed.add(event.subscription_id)
+    failed -= gone.keys()
+    succeeded -= failed | gone.keys()
+    return gone, failed, succeeded
+
+
+def _update_subscriptions(events: list[TriggerEvent]) -> None:
+    """
+    Update subscription health from the final event of each push.
+
+    A 410 response means that the hook no longer exists, and the
+    subscription is unsubscribed. Otherwise the subscription failure
+    count is reset by a successful push, and incremented by a failed
+    one - pausing the subscription if PAUSE_AFTER_FAILURES is set and
+    has been reached. Each subscription is updated once (see
+    `_settle_outcomes`).
+
+    """
+    gone, failed, succeeded = _settle_outcomes(events)
+    for subscription in gone.values():
+        logger.info("Unsubscribing %s (410 Gone).", subscription)
+        subscription.unsubscribe()
+    if succeeded:
+        TriggerSubscription.objects.filter(id__in=succeeded).record_success()
+    if failed:
+        paused = TriggerSubscription.objects.filter(id__in=failed).record_failure(
+            pause_after=PAUSE_AFTER_FAILURES
+        )
+        if paused:
+            logger.warning("Paused %i failing subscriptions.", paused)
+
+
+def _apply_recording_policy(events: list[TriggerEvent]) -> list[TriggerEvent]:
+    """Replace the event data with what the trigger recording policy records."""
+    for event in events:
+        policy = get_recording_policy(event.trigger)
+        if policy != "full":
+            event.event_data = get_recorded_data(
+                event.trigger, event.event_data, policy
+            )
+    return events
+
+
+def _save_events(events: list[TriggerEvent]) -> list[TriggerEvent]:
+    """Write buffered events to the database in bulk."""
+    return TriggerEvent.objects.bulk_create(_apply_recording_policy(events))
+
+
+def _fan_out(
+    events: list[TriggerEvent],
+    max_workers: int | None = None,
+    batch_size: int | None = None,
+) -> PushResult:
+    """
+    POST a list of unsaved events concurrently, and save the results.
+
+    The HTTP requests are made from a bounded thread pool. The events
+    are buffered in the calling thread as each request completes, and
+    written using bulk_create every `batch_size` events. The `uuid` of
+    each event is set on creation, so it is available whether or not the
+    database backend returns primary keys from a bulk insert.
+
+    Every attempt is saved, and the final attempt for each push is
+    returned in the result events.
+
+    """
+    batch_size = batch_size or BULK_CREATE_BATCH_SIZE
+    started_at = tz_now()
+    final: list[TriggerEvent] = []
+    buffer: list[TriggerEvent] = []
+    with ThreadPoolExecutor(max_workers=max_workers or PUSH_MAX_WORKERS) as executor:
+        futures = [executor.submit(_post, e) for e in events]
+        for future in as_completed(futures):
+            attempts = future.result()
+            final.append(attempts[-1])
+            buffer += attempts
+            if len(buffer) >= batch_size:
+                _save_events(buffer)
+                buffer = []
+    if buffer:
+        _save_events(buffer)
+    _update_subscriptions(final)
+    result = PushResult(events=final, started_at=started_at, finished_at=tz_now())
+    logger.info(
+        "Pushed data to %i subscriptions in %s (%i failed).",
+        len(final),
+        result.duration,
+        len([e for e in final if e.is_retryable]),
+    )
+    return result
+
+
+def push(
+    subscription: TriggerSubscription, event_data: dict, encoded: bytes | None = None
+) -> TriggerEvent:
+    """
+    Push data to Zapier.
+
+    If the data has already been encoded as JSON, pass in the `encoded`
+    bytes to avoid encoding it again.
+
+    """
+    logger.debug("Pushing webhook data:\n%s", event_data)
+    attempts = _post(_new_event(subscription, event_data, encoded))
+    _save_events(attempts)
+    _update_subscriptions(attempts[-1:])
+    return attempts[-1]
+
+
+def push_many(
+    subscriptions: Iterable[TriggerSubscription],
+    event_data: PushData,
+    max_workers: int | None = None,
+    batch_size: int | None = None,
+    encoded: bytes | None = None,
+) -> PushResult:
+    """
+    Push the same data to many subscriptions concurrently.
+
+    The data is encoded as JSON once (unless `encoded` is passed in), and
+    the same bytes are used as the request body for every subscription,
+    and stored as the event_data for every event.
+
+    """
+    if encoded is None:
+        encoded = encode_json(event_data)
+    events = [_new_event(s, event_data, encoded) for s in subscriptions]
+    logger.debug(
+        "Pushing webhook data to %i subscriptions:\n%s", len(events), event_data
+    )
+    return _fan_out(events, max_workers=max_workers, batch_size=batch_size)
+
+
+def push_batched(
+    subscriptions: Iterable[TriggerSubscription],
+    objects: Iterable[dict],
+    max_objects: int | None = None,
+    max_bytes: int | None = None,
+    max_workers: int | None = None,
+) -> PushResult:
+    """
+    Push many objects to many subscriptions, in batches.
+
+    Zapier accepts a JSON array in a webhook POST (and triggers the Zap
+    for each object in it), so instead of one request per object per
+    subscription the objects are packed into batches (see batch_objects),
+    and each batch is pushed to every subscription concurrently. The
+    `object_count` of each event is the number of objects in its batch.
+
+    """
+    subscriptions = list(subscriptions)
+    events = [
+        _new_event(s, batch, encoded)
+        for batch, encoded in batch_objects(objects, max_objects, max_bytes)
+        for s in subscriptions
+    ]
+    logger.debug(
+        "Pushing %i batches of webhook data to %i subscriptions.",
+        len(events),
+        len(subscriptions),
+    )
+    return _fan_out(events, max_workers=max_workers)
+
+
+def evaluate_push_data(data: LazyPushData) -> PushData:
+    """Return the push data, calling it or evaluating it if it is lazy."""
+    if callable(data):
+        data = data()
+    if isinstance(data, (dict, list)):
+        return data
+    return list(data)
+
+
+def push_trigger(
+    trigger: str,
+    data: LazyPushData,
+    batched: bool = False,
+    max_workers: int | None = None,
+) -> PushResult | None:
+    """
+    Push data to all of the active subscriptions to a trigger.
+
+    The data may be a callable, or a lazy iterable such as a QuerySet of
+    dicts (e.g. from `values()`), which is only evaluated if the trigger
+    has subscribers - and then only once, however many there are - so
+    pushing data that nobody is listening for costs a cached lookup:
+
+        push_trigger("new_book", lambda: book.serialize())
+
+    If `batched` is True the data is a list of objects, pushed using
+    `push_batched`, else it is pushed as a single request body using
+    `push_many`. Returns None if the trigger has no subscribers.
+
+    """
+    if not TriggerSubscription.objects.has_subscribers(trigger):
+        logger.debug("Skipping push to '%s' trigger (no subscribers).", trigger)
+        return None
+    subscriptions = TriggerSubscription.objects.cached_active(trigger)
+    event_data = evaluate_push_data(data)
+    if batched:
+        objects = [event_data] if isinstance(event_data, dict) else event_data
+        return push_batched(subscriptions, objects, max_workers=max_workers)
+    return push_many(subscriptions, event_data, max_workers=max_workers)
+
+
+async def _aattempt(client: Any, event: TriggerEvent) -> TriggerEvent:
+    """Async version of _attempt, using an httpx.AsyncClient."""
+    import httpx
+
+    event.started_at = tz_now()
+    try:
+        response = await client.post(
+            event.subscription.target_url,
+            content=get_encoded_value(event, "event_data"),
+            headers={"Content-Type": "application/json"},
+            timeout=TIMEOUT,
+        )
+    except httpx.HTTPError as ex:
+        logger.warning("Error pushing data to %s: %r", event.subscription, ex)
+        event.error = repr(ex)[:255]
+    else:
+        event.status_code = response.status_code
+    event.finished_at = tz_now()
+    return event
+
+
+async def _apost(client: Any, event: TriggerEvent) -> list[TriggerEvent]:
+    """Async version of _post - the retry loop, behind the circuit breaker."""
+    breaker = get_circuit_breaker(event.subscription.target_url)
+    attempts: list[TriggerEvent] = []
+    for attempt in range(1, PUSH_RETRIES + 2):
+        if attempt > 1:
+            await asyncio.sleep(_backoff(attempt - 1))
+            event = _retry_event(event, attempt)
+        if not breaker.allow_request():
+            attempts.append(_fail_fast(event))
+            break
+        attempts.append(await _aattempt(client, event))
+        if not event.is_retryable:
+            breaker.record_success()
+            break
+        breaker.record_failure()
+    return attempts
+
+
+async def apush_many(
+    subscriptions: Iterable[TriggerSubscription],
+    event_data: dict,
+    max_workers: int | None = None,
+    encoded: bytes | None = None,
+) -> PushResult:
+    """
+    Async version of push_many (requires httpx).
+
+    The requests are made concurrently from the event loop (at most
+    `max_workers` at a time), using the loop's pooled AsyncClient (see
+    `get_async_client`), and the events are written using `abulk_create`.
+    A QuerySet of subscriptions is evaluated asynchronously.
+
+    """
+    if isinstance(subscriptions, QuerySet):
+        subscriptions = [s async for s in subscriptions]
+    if encoded is None:
+        encoded = encode_json(event_data)
+    events = [_new_event(s, event_data, encoded) for s in subscriptions]
+    semaphore = asyncio.Semaphore(max_workers or PUSH_MAX_WORKERS)
+    started_at = tz_now()
+
+    async def post(client: Any, event: TriggerEvent) -> list[TriggerEvent]:
+        async with semaphore:
+            return await _apost(client, event)
+
+    client = get_async_client()
+    results = await asyncio.gather(*[post(client, e) for e in events])
+    attempts = [a for r in results for a in r]
+    final = [r[-1] for r in results]
+    await TriggerEvent.objects.abulk_create(
+        _apply_recording_policy(attempts), batch_size=BULK_CREATE_BATCH_SIZE
+    )
+    await sync_to_async(_update_subscriptions)(final)
+    result = PushResult(events=final, started_at=started_at, finished_at=tz_now())
+    logger.info(
+        "Pushed data to %i subscriptions in %s (%i failed).",
+        len(final),
+        result.duration,
+        len([e for e in final if e.is_retryable]),
+    )
+    return result
+
+
+async def apush(
+    subscription: TriggerSubscription, event_data: dict, encoded: bytes | None = None
+) -> TriggerEvent:
+    """Async version of push (requires httpx)."""
+    result = await apush_many([subscription], event_data, encoded=encoded)
+    return result.events[0]
+
+
+def enqueue(subscription: TriggerSubscription, event_data: dict) -> TriggerDelivery:
+    """Add data to the outbox, to be pushed by the zapier_push_worker command."""
+    return TriggerDelivery.objects.enqueue(subscription, event_data)
+
+
+def enqueue_many(
+    subscriptions: Iterable[TriggerSubscription], event_data: dict
+) -> list[TriggerDelivery]:
+    """Add the same data to the outbox for many subscriptions."""
+    encoded = encode_json(event_data)
+    deliveries = [TriggerDelivery(subscription=s) for s in subscriptions]
+    for delivery in deliveries:
+        set_encoded_value(delivery, "event_data", event_data, encoded)
+    return TriggerDelivery.objects.bulk_create(
+        deliveries, batch_size=BULK_CREATE_BATCH_SIZE
+    )
+
+
+def push_deliveries(
+    deliveries: Iterable[TriggerDelivery], max_workers: int | None = None
+) -> PushResult:
+    """
+    Push claimed outbox deliveries, and mark the successful ones.
+
+    Each delivery is recorded as a TriggerEvent with the same `uuid` as
+    the delivery. Deliveries whose final attempt failed (and could be
+    retried) are left undelivered, and will be claimed again once the
+    claim has expired.
+
+    """
+    events = [_new_event(d.subscription, d.event_data, uuid=d.uuid) for d in deliveries]
+    result = _fan_out(events, max_workers=max_workers)
+    delivered = [e.uuid for e in result.events if not e.is_retryable]
+    TriggerDelivery.objects.filter(uuid__in=delivered).update(
+        delivered_at=result.finished_at
     )
+    return result
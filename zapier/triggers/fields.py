@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from django.db import models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models.fields.json import KeyTransform
+
+from . import compression
+from .encoding import decode_json, encode_json
+
+
+class RawJSON:
+    """JSON that has already been encoded, and is written as-is."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class RawJSONEncoder(json.JSONEncoder):
+    """Encoder that returns RawJSON text without encoding it again."""
+
+    def encode(self, o: Any) -> str:
+        return o.text if isinstance(o, RawJSON) else super().encode(o)
+
+
+def set_encoded_value(
+    instance: models.Model, attname: str, value: Any, encoded: bytes
+) -> None:
+    """Set the value of an EncodedJSONField, along with its encoded form."""
+    setattr(instance, attname, value)
+    setattr(instance, f"_{attname}_encoded", (value, encoded))
+
+
+def get_encoded_value(instance: models.Model, attname: str) -> bytes | None:
+    """Return the encoded form of an EncodedJSONField value, if it is known."""
+    value, encoded = getattr(instance, f"_{attname}_encoded", (None, None))
+    if encoded is not None and value is getattr(instance, attname):
+        return encoded
+    return None
+
+
+class EncodedJSONField(models.JSONField):
+    """
+    JSONField that is encoded using the configured JSON_BACKEND.
+
+    If the value was set using set_encoded_value (e.g. because the same
+    JSON was used as an HTTP request body), the encoded form is written
+    to the database instead of encoding the value a second time. If the
+    value has been replaced since, it is encoded as normal.
+
+    Only saved values, and values read from the database, go through the
+    JSON_BACKEND - lookups are left to the JSONField implementation.
+
+    """
+
+    def pre_save(self, model_instance: models.Model, add: bool) -> Any:
+        value = super().pre_save(model_instance, add)
+        if (encoded := get_encoded_value(model_instance, self.attname)) is not None:
+            return RawJSON(encoded.decode())
+        return value
+
+    def get_db_prep_save(self, value: Any, connection: BaseDatabaseWrapper) -> Any:
+        # None (SQL NULL) and expressions are handled by JSONField
+        if value is None or hasattr(value, "as_sql"):
+            return super().get_db_prep_save(value, connection)
+        if not isinstance(value, RawJSON):
+            value = RawJSON(encode_json(value).decode())
+        return connection.ops.adapt_json_value(value, RawJSONEncoder)
+
+    def from_db_value(
+        self, value: Any, expression: Any, connection: BaseDatabaseWrapper
+    ) -> Any:
+        if not isinstance(value, str) or isinstance(expression, KeyTransform):
+            return super().from_db_value(value, expression, connection)
+        try:
+            return decode_json(value)
+        except ValueError:
+            return value
+
+
+class CompressibleJSONField(EncodedJSONField):
+    """
+    EncodedJSONField that can store its value compressed in another field.
+
+    If COMPRESS_EVENT_DATA is set, the encoded JSON is compressed (using
+    the dictionary of the trigger in `dictionary_field`, if there is one)
+    and written to the BinaryField `compressed_field`, and this column is
+    left NULL. The model decodes the compressed value when it is loaded
+    (see `decompress_json`), so reading the value is transparent - but
+    database JSON lookups only match uncompressed values.
+
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        compressed_field: str = "",
+        dictionary_field: str = "",
+        **kwargs: Any,
+    ) -> None:
+        self.compressed_field = compressed_field
+        self.dictionary_field = dictionary_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self) -> Any:
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["compressed_field"] = self.compressed_field
+        kwargs["dictionary_field"] = self.dictionary_field
+        return name, path, args, kwargs
+
+    def compress_value(self, model_instance: models.Model, value: Any) -> bytes:
+        """Return the value encoded as JSON, and compressed."""
+        encoded = get_encoded_value(model_instance, self.attname)
+        if encoded is None and isinstance(value, RawJSON):
+            encoded = value.text.encode()
+        elif encoded is None:
+            encoded = encode_json(value)
+        key = getattr(model_instance, self.dictionary_field, "")
+        return compression.compress(encoded, key)
+
+    def pre_save(self, model_instance: models.Model, add: bool) -> Any:
+        value = getattr(model_instance, self.attname)
+        # the compressed field is saved after this one, so set it first
+        if value is None or not compression.COMPRESS_EVENT_DATA:
+            setattr(model_instance, self.compressed_field, None)
+            return super().pre_save(model_instance, add)
+        compressed = self.compress_value(model_instance, value)
+        setattr(model_instance, self.compressed_field, compressed)
+        return None
+
+
+def decompress_json(data: bytes | memoryview) -> Any:
+    """Decode a value stored by CompressibleJSONField."""
+    return decode_json(compression.decompress(data))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Any
+
+import requests
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# number of per-host connection pools to keep
+POOL_CONNECTIONS = get_setting("HTTP_POOL_CONNECTIONS")
+
+# max number of keep-alive connections per host
+POOL_MAXSIZE = get_setting("HTTP_POOL_MAXSIZE")
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+
+# map of event loop: the AsyncClient used in that loop
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def create_session() -> requests.Session:
+    """Return a new Session using the configured connection pool sizes."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide Session used for webhook delivery.
+
+    The Session is created on first use, and shared by all threads in
+    the process, so that connections (and their TLS handshakes) to the
+    webhook hosts are reused across pushes.
+
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                logger.debug("Creating HTTP session (pid=%i).", os.getpid())
+                _session = create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Close the process-wide Session, and its pooled connections."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def create_async_client() -> Any:
+    """Return a new httpx.AsyncClient using the configured pool size."""
+    try:
+        import httpx
+    except ImportError as ex:
+        raise ImproperlyConfigured("Async push requires httpx.") from ex
+    limits = httpx.Limits(
+        max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+def get_async_client() -> Any:
+    """
+    Return the AsyncClient used by the async push functions.
+
+    An async client is bound to the event loop in which it is used, so
+    one client is created per loop (and shared by all pushes in it), so
+    that connections are reused across pushes. The client is dropped
+    along with its loop.
+
+    """
+    loop = asyncio.get_running_loop()
+    if (client := _async_clients.get(loop)) is None or client.is_closed:
+        logger.debug("Creating async HTTP client (pid=%i).", os.getpid())
+        client = _async_clients[loop] = create_async_client()
+    return client
+
+
+def _reset_after_fork() -> None:
+    """
+    Discard the parent process Session in a forked child.
+
+    Sockets inherited from the parent must not be shared with it (e.g.
+    gunicorn / celery prefork workers), so the child drops its reference
+    (without closing the parent connections) and creates its own Session
+    on first use. The lock is replaced as it may have been held at the
+    time of the fork.
+
+    """
+    global _async_clients, _lock, _session
+    _lock = threading.Lock()
+    _session = None
+    _async_clients = weakref.WeakKeyDictionary()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
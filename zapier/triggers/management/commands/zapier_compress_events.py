@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from zapier.triggers.compression import build_dictionary, compress
+from zapier.triggers.encoding import encode_json
+from zapier.triggers.models import TriggerEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Compress the event_data of existing TriggerEvents."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of events compressed per transaction.",
+        )
+        parser.add_argument(
+            "--trigger",
+            default="",
+            help="Only compress the events of this trigger.",
+        )
+        parser.add_argument(
+            "--build-dictionary",
+            metavar="PATH",
+            default="",
+            help=(
+                "Instead of compressing, write a compression dictionary built "
+                "from the most recent events of --trigger to PATH."
+            ),
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=1000,
+            help="Number of events sampled to build a dictionary.",
+        )
+
+    def get_queryset(self, trigger: str) -> Any:
+        events = TriggerEvent.objects.filter(event_data__isnull=False)
+        if trigger:
+            events = events.filter(trigger=trigger)
+        return events.only("id", "trigger", "event_data").order_by("id")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["build_dictionary"]:
+            self.write_dictionary(**options)
+            return
+        events = self.get_queryset(options["trigger"])
+        count, size, compressed_size = 0, 0, 0
+        last_id = 0
+        while batch := list(events.filter(id__gt=last_id)[: options["batch_size"]]):
+            sizes = self.compress_batch(batch)
+            count += len(batch)
+            size += sizes[0]
+            compressed_size += sizes[1]
+            last_id = batch[-1].id
+            logger.debug("Compressed events up to #%i.", last_id)
+        ratio = size / compressed_size if compressed_size else 0
+        self.stdout.write(
+            f"Compressed {count} events "
+            f"({size} bytes to {compressed_size} bytes, {ratio:.1f}x)."
+        )
+
+    def compress_batch(self, batch: list[TriggerEvent]) -> tuple[int, int]:
+        """
+        Move the event_data of a batch of events to event_data_compressed.
+
+        Each batch is updated in a transaction, using one UPDATE for the
+        compressed data, and one to clear the uncompressed data.
+
+        """
+        size, compressed_size = 0, 0
+        for event in batch:
+            encoded = encode_json(event.event_data)
+            event.event_data_compressed = compress(encoded, event.trigger)
+            size += len(encoded)
+            compressed_size += len(event.event_data_compressed)
+        with transaction.atomic():
+            TriggerEvent.objects.bulk_update(batch, ["event_data_compressed"])
+            TriggerEvent.objects.filter(id__in=[e.id for e in batch]).update(
+                event_data=None
+            )
+        return size, compressed_size
+
+    def write_dictionary(self, **options: Any) -> None:
+        if not options["trigger"]:
+            raise CommandError("--build-dictionary requires --trigger.")
+        events = TriggerEvent.objects.filter(trigger=options["trigger"])
+        recent = events.order_by("-id")[: options["samples"]]
+        samples = [
+            encode_json(e.event_data)
+            for e in reversed(list(recent))
+            if e.event_data is not None
+        ]
+        dictionary = build_dictionary(samples)
+        with open(options["build_dictionary"], "wb") as f:
+            f.write(dictionary)
+        self.stdout.write(
+            f"Wrote {len(dictionary)} byte dictionary "
+            f"({len(samples)} samples) to {options['build_dictionary']}."
+        )
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import signal
+import time
+from types import FrameType
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from zapier.triggers.event import push_deliveries
+from zapier.triggers.models import TriggerDelivery
+from zapier.triggers.settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Push pending outbox deliveries to Zapier."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=get_setting("OUTBOX_BATCH_SIZE"),
+            help="Number of deliveries claimed per batch.",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=None,
+            help="Number of concurrent HTTP requests (defaults to PUSH_MAX_WORKERS).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling an empty outbox again.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the outbox is empty, instead of waiting for more.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.running = True
+        handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            delivered = self.run(**options)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(f"Pushed {delivered} deliveries.")
+
+    def run(self, **options: Any) -> int:
+        """Claim and push batches until stopped, or the outbox is empty."""
+        delivered = 0
+        max_attempts = get_setting("OUTBOX_MAX_ATTEMPTS")
+        while self.running:
+            close_old_connections()
+            deliveries = TriggerDelivery.objects.claim(
+                batch_size=options["batch_size"],
+                claim_timeout=get_setting("OUTBOX_CLAIM_TIMEOUT"),
+                max_attempts=max_attempts,
+            )
+            if deliveries:
+                delivered += self.push(deliveries, max_attempts, options["max_workers"])
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+        return delivered
+
+    def push(
+        self,
+        deliveries: list[TriggerDelivery],
+        max_attempts: int,
+        max_workers: int | None,
+    ) -> int:
+        """
+        Push a batch of deliveries, returning the number delivered.
+
+        A delivery whose last attempt failed is abandoned - it stays
+        pending, but is never claimed again (see `abandoned`).
+
+        """
+        result = push_deliveries(deliveries, max_workers=max_workers)
+        failed = {e.uuid for e in result.events if e.is_retryable}
+        for delivery in deliveries:
+            if delivery.uuid in failed and delivery.attempts >= max_attempts:
+                logger.warning(
+                    "Abandoned %s after %i attempts.", delivery, delivery.attempts
+                )
+        return len(result.events) - len(failed)
+
+    def stop(self, signum: int, frame: FrameType | None) -> None:
+        """Finish the current batch, then exit."""
+        logger.info("Received signal %i, stopping worker.", signum)
+        self.running = False
@@ -1,4 +1,3 @@
-import json
 import logging
 import uuid
 from typing import Callable
@@ -8,6 +7,8 @@ from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpRequest, HttpResponse
 from rest_framework.request import Request
 
+from .encoding import decode_json, encode_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,8 +16,8 @@ def dump_json(data: bytes) -> str:
     if not data:
         return "(empty)"
     try:
-        return json.dumps(json.loads(data), indent=2, sort_keys=True)
-    except json.JSONDecodeError:
+        return encode_json(decode_json(data), pretty=True).decode()
+    except ValueError:
         logger.exception("Error decoding data")
         return "(error)"
 
@@ -40,13 +41,15 @@ class JsonRequestDumpMiddleware:
         logger.debug(
             "%s - request headers:\n%s",
             request_id,
-            json.dumps(dict(request.headers), indent=2, sort_keys=True),
+            encode_json(dict(request.headers), pretty=True).decode(),
         )
         if is_json_request(request):
             logger.debug("%s - request body:\n%s", request_id, dump_json(request.body))
         response = self.get_response(request)
         if is_json_request(request):
-            logger.debug(
-                "%s - response content:\n%s", request_id, dump_json(response.content)
+            # streaming content can only be read once (by the client)
+            content = (
+                "(streaming)" if response.streaming else dump_json(response.content)
             )
+            logger.debug("%s - response content:\n%s", request_id, content)
         return response
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import uuid
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0003_triggerevent_object_count_triggerevent_uuid"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TriggerDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="Public ID, shared with the TriggerEvent.",
+                    ),
+                ),
+                (
+                    "event_data",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="JSON data to send to Zapier.",
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "claimed_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Timestamp marking when a worker last claimed the delivery.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.IntegerField(
+                        default=0,
+                        help_text="The number of times the delivery was claimed.",
+                    ),
+                ),
+                ("delivered_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "subscription",
+                    models.ForeignKey(
+                        help_text="The subscription to which the data will be posted.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="zapier_triggers.triggersubscription",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "trigger deliveries",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("delivered_at__isnull", True)),
+                        fields=["claimed_at"],
+                        name="zapier_delivery_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0004_triggerdelivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="triggerevent",
+            name="attempt",
+            field=models.IntegerField(
+                default=1, help_text="The delivery attempt number (for POST events)."
+            ),
+        ),
+        migrations.AddField(
+            model_name="triggerevent",
+            name="error",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="The reason no response was received from Zapier.",
+                max_length=255,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="triggerevent",
+            name="status_code",
+            field=models.IntegerField(
+                blank=True,
+                help_text="HTTP status code received from Zapier (null if no response was received).",
+                null=True,
+            ),
+        ),
+    ]
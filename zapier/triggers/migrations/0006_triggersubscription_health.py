@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0005_triggerevent_attempt_error"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="triggersubscription",
+            name="consecutive_failures",
+            field=models.IntegerField(
+                default=0,
+                help_text="The number of pushes that have failed since the last success.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="triggersubscription",
+            name="last_failure_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=None,
+                help_text="Timestamp of the last failed push.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="triggersubscription",
+            name="last_success_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=None,
+                help_text="Timestamp of the last successful push.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="triggersubscription",
+            name="paused_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=None,
+                help_text="Timestamp marking when the subscription was paused (excluded from active subscriptions) after repeated failures.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import django.core.serializers.json
+from django.db import migrations
+
+import zapier.triggers.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0006_triggersubscription_health"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="triggerdelivery",
+            name="event_data",
+            field=zapier.triggers.fields.EncodedJSONField(
+                blank=True,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text="JSON data to send to Zapier.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="triggerevent",
+            name="event_data",
+            field=zapier.triggers.fields.EncodedJSONField(
+                blank=True,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text="JSON data sent to Zapier.",
+                null=True,
+            ),
+        ),
+    ]
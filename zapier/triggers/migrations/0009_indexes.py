@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0008_triggercursor"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="triggerevent",
+            name="uuid",
+            field=models.UUIDField(
+                db_index=True,
+                default=uuid.uuid4,
+                help_text="Public ID used for tracking purposes.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="triggersubscription",
+            name="uuid",
+            field=models.UUIDField(
+                default=uuid.uuid4, help_text="Public ID", unique=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="triggerevent",
+            index=models.Index(
+                fields=["user", "trigger", "-started_at"],
+                name="zapier_event_user_trigger_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="triggersubscription",
+            index=models.Index(
+                condition=models.Q(
+                    ("paused_at__isnull", True),
+                    ("subscribed_at__isnull", False),
+                    ("unsubscribed_at__isnull", True),
+                ),
+                fields=["trigger"],
+                name="zapier_sub_active_trigger_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:38
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+import zapier.triggers.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zapier_triggers", "0009_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="triggerevent",
+            name="event_data_compressed",
+            field=models.BinaryField(
+                blank=True,
+                help_text="JSON data sent to Zapier, compressed (if COMPRESS_EVENT_DATA is set).",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="triggerevent",
+            name="event_data",
+            field=zapier.triggers.fields.CompressibleJSONField(
+                blank=True,
+                compressed_field="event_data_compressed",
+                dictionary_field="trigger",
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text="JSON data sent to Zapier.",
+                null=True,
+            ),
+        ),
+    ]
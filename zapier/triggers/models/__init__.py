@@ -1,4 +1,6 @@
+from .trigger_cursor import TriggerCursor
+from .trigger_delivery import TriggerDelivery
 from .trigger_event import TriggerEvent
 from .trigger_subscription import TriggerSubscription
 
-__all__ = ["TriggerEvent", "TriggerSubscription"]
+__all__ = ["TriggerCursor", "TriggerDelivery", "TriggerEvent", "TriggerSubscription"]
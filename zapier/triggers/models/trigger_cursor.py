@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings as django_settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _lazy
+
+
+class TriggerCursorManager(models.Manager):
+    def get_value(self, user: django_settings.AUTH_USER_MODEL, trigger: str) -> Any:
+        """Return the current cursor value (None if there is no cursor)."""
+        return (
+            self.filter(user=user, trigger=trigger)
+            .values_list("value", flat=True)
+            .first()
+        )
+
+    def advance(
+        self, user: django_settings.AUTH_USER_MODEL, trigger: str, value: Any
+    ) -> TriggerCursor:
+        """Set the cursor value for the user and trigger."""
+        cursor, _ = self.update_or_create(
+            user=user, trigger=trigger, defaults={"value": value}
+        )
+        return cursor
+
+    async def aget_value(
+        self, user: django_settings.AUTH_USER_MODEL, trigger: str
+    ) -> Any:
+        return await (
+            self.filter(user=user, trigger=trigger)
+            .values_list("value", flat=True)
+            .afirst()
+        )
+
+    async def aadvance(
+        self, user: django_settings.AUTH_USER_MODEL, trigger: str, value: Any
+    ) -> TriggerCursor:
+        cursor, _ = await self.aupdate_or_create(
+            user=user, trigger=trigger, defaults={"value": value}
+        )
+        return cursor
+
+
+class TriggerCursor(models.Model):
+    """
+    High-water mark of the data returned to Zapier by a polling trigger.
+
+    For triggers configured with a "cursor" field, this records the
+    highest value of that field (e.g. "id") returned to each user, so
+    that the next poll only needs to fetch newer objects.
+
+    """
+
+    user = models.ForeignKey(
+        django_settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="zapier_trigger_cursors",
+    )
+    trigger = models.CharField(
+        max_length=100, help_text=_lazy("The name of the Zapier trigger.")
+    )
+    value = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        help_text=_lazy("The highest cursor value returned to Zapier."),
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TriggerCursorManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "trigger"], name="unique_user_trigger_cursor"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"'{self.trigger}' cursor #{self.id}"
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils.timezone import now as tz_now
+from django.utils.translation import gettext_lazy as _lazy
+
+from ..fields import EncodedJSONField
+from .trigger_subscription import TriggerSubscription
+
+logger = logging.getLogger(__name__)
+
+
+class TriggerDeliveryQuerySet(models.QuerySet):
+    def pending(self) -> TriggerDeliveryQuerySet:
+        """Filter deliveries that have not yet been delivered."""
+        return self.filter(delivered_at__isnull=True)
+
+    def abandoned(self, max_attempts: int) -> TriggerDeliveryQuerySet:
+        """Filter pending deliveries that have run out of attempts."""
+        return self.pending().filter(attempts__gte=max_attempts)
+
+    def claimable(
+        self, claim_timeout: int, max_attempts: int
+    ) -> TriggerDeliveryQuerySet:
+        """
+        Filter pending deliveries that can be claimed by a worker.
+
+        A delivery is claimable if it has never been claimed, or if the
+        previous claim has expired (the worker died, or the delivery
+        failed), as long as it has not run out of attempts - and its
+        subscription is still active. Deliveries to a paused subscription
+        are held until it is resumed.
+
+        """
+        expired = tz_now() - timedelta(seconds=claim_timeout)
+        return (
+            self.pending()
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+            .filter(attempts__lt=max_attempts)
+            .filter(subscription__in=TriggerSubscription.objects.active())
+        )
+
+
+class TriggerDeliveryManager(models.Manager):
+    def enqueue(
+        self, subscription: TriggerSubscription, event_data: dict
+    ) -> TriggerDelivery:
+        """Add a new delivery to the outbox."""
+        return self.create(subscription=subscription, event_data=event_data)
+
+    def claim(
+        self, *, batch_size: int, claim_timeout: int, max_attempts: int
+    ) -> list[TriggerDelivery]:
+        """
+        Claim a batch of deliveries for the current worker.
+
+        The rows are locked using SELECT ... FOR UPDATE SKIP LOCKED, so
+        that concurrent workers claim disjoint batches, and the claim is
+        recorded (and the lock released) before any HTTP requests are
+        made. Backends that do not support row locking (SQLite) ignore
+        the FOR UPDATE clause.
+
+        """
+        with transaction.atomic():
+            ids = list(
+                self.claimable(claim_timeout, max_attempts)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            self.filter(id__in=ids).update(
+                claimed_at=tz_now(), attempts=F("attempts") + 1
+            )
+        return list(
+            self.filter(id__in=ids).select_related("subscription").order_by("id")
+        )
+
+
+class TriggerDelivery(models.Model):
+    """
+    Outbox of webhook deliveries waiting to be pushed to Zapier.
+
+    Deliveries are pushed by the `zapier_push_worker` management command.
+    Once delivered, the TriggerEvent recording the push has the same
+    `uuid` as the delivery.
+
+    """
+
+    uuid = models.UUIDField(
+        default=uuid4, help_text=_lazy("Public ID, shared with the TriggerEvent.")
+    )
+    subscription = models.ForeignKey(
+        TriggerSubscription,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        help_text=_lazy("The subscription to which the data will be posted."),
+    )
+    event_data = EncodedJSONField(
+        blank=True,
+        null=True,
+        encoder=DjangoJSONEncoder,
+        help_text=_lazy("JSON data to send to Zapier."),
+    )
+    created_at = models.DateTimeField(default=tz_now)
+    claimed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_lazy("Timestamp marking when a worker last claimed the delivery."),
+    )
+    attempts = models.IntegerField(
+        default=0, help_text=_lazy("The number of times the delivery was claimed.")
+    )
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    objects = TriggerDeliveryManager.from_queryset(TriggerDeliveryQuerySet)()
+
+    class Meta:
+        verbose_name_plural = "trigger deliveries"
+        indexes = [
+            models.Index(
+                fields=["claimed_at"],
+                condition=Q(delivered_at__isnull=True),
+                name="zapier_delivery_pending_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Delivery #{self.id} ('{self.subscription.trigger}')"
+
+    @property
+    def is_delivered(self) -> bool:
+        return self.delivered_at is not None
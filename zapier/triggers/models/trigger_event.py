@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import logging
+import zlib
 from datetime import timedelta
+from typing import Any, Iterable, Sequence
 from uuid import uuid4
 
 from django.conf import settings as django_settings
@@ -9,12 +12,18 @@ from django.db import models
 from django.utils.timezone import now as tz_now
 from django.utils.translation import gettext_lazy as _lazy
 
+from ..fields import CompressibleJSONField, decompress_json
 from .trigger_subscription import TriggerSubscription
 
+logger = logging.getLogger(__name__)
+
 
 class TriggerEvent(models.Model):
     uuid = models.UUIDField(
-        default=uuid4, help_text=_lazy("Public ID used for tracking purposes.")
+        default=uuid4,
+        # not unique - every attempt of a push shares the same uuid
+        db_index=True,
+        help_text=_lazy("Public ID used for tracking purposes."),
     )
     user = models.ForeignKey(
         django_settings.AUTH_USER_MODEL,
@@ -38,24 +47,106 @@ class TriggerEvent(models.Model):
         max_length=4,
         help_text=_lazy("How the data was sent to Zapier - via GET, or POST."),
     )
-    event_data = models.JSONField(
+    event_data = CompressibleJSONField(
         blank=True,
         null=True,
         encoder=DjangoJSONEncoder,
+        compressed_field="event_data_compressed",
+        dictionary_field="trigger",
         help_text=_lazy("JSON data sent to Zapier."),
     )
+    event_data_compressed = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_lazy(
+            "JSON data sent to Zapier, compressed (if COMPRESS_EVENT_DATA is set)."
+        ),
+    )
     object_count = models.IntegerField(
         default=0, help_text=_lazy("The count of objects stored in the event_data.")
     )
     started_at = models.DateTimeField(default=tz_now, blank=True, null=True)
     finished_at = models.DateTimeField(blank=True, null=True)
     status_code = models.IntegerField(
-        help_text=_lazy("HTTP status code received from Zapier")
+        blank=True,
+        null=True,
+        help_text=_lazy(
+            "HTTP status code received from Zapier (null if no response was received)."
+        ),
+    )
+    attempt = models.IntegerField(
+        default=1, help_text=_lazy("The delivery attempt number (for POST events).")
+    )
+    error = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text=_lazy("The reason no response was received from Zapier."),
     )
 
+    class Meta:
+        indexes = [
+            # polling history for a user + trigger, most recent first
+            models.Index(
+                fields=["user", "trigger", "-started_at"],
+                name="zapier_event_user_trigger_idx",
+            )
+        ]
+
     def __str__(self) -> str:
         return f"'{self.trigger}' event #{self.id}"
 
+    @classmethod
+    def from_db(
+        cls, db: str | None, field_names: Iterable[str], values: Sequence[Any]
+    ) -> TriggerEvent:
+        """
+        Decompress the event_data, if it was stored compressed.
+
+        Data that can't be decompressed is logged, and left as None, so
+        that one bad row doesn't break every query that loads it.
+
+        """
+        instance = super().from_db(db, field_names, values)
+        # use __dict__ so that deferred fields are not loaded
+        loaded = instance.__dict__
+        if loaded.get("event_data") is None and loaded.get("event_data_compressed"):
+            try:
+                instance.event_data = decompress_json(loaded["event_data_compressed"])
+            except (ValueError, zlib.error):
+                # e.g. the trigger's dictionary has been changed or removed
+                logger.exception("Unable to decompress %s event_data.", instance)
+        return instance
+
+    def refresh_from_db(
+        self,
+        using: str | None = None,
+        fields: Iterable[str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Load event_data_compressed whenever (deferred) event_data is loaded."""
+        if fields is not None and "event_data" in (fields := list(fields)):
+            fields.append("event_data_compressed")
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+    @property
+    def is_success(self) -> bool:
+        """Return True if Zapier accepted the data."""
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+    @property
+    def is_gone(self) -> bool:
+        """Return True if Zapier reported that the subscription no longer exists."""
+        return self.status_code == 410
+
+    @property
+    def is_retryable(self) -> bool:
+        """Return True if the request failed, and may succeed if repeated."""
+        if self.status_code is None:
+            return True
+        return self.status_code == 429 or self.status_code >= 500
+
     @property
     def duration(self) -> timedelta | None:
         if not self.finished_at:
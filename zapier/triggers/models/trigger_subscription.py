@@ -1,24 +1,56 @@
 from __future__ import annotations
 
 import logging
+from typing import Any
 from uuid import uuid4
 
 from django.conf import settings as django_settings
-from django.db import IntegrityError, models
+from django.db import models
+from django.db.models import F, Q
 from django.utils.timezone import now as tz_now
 from django.utils.translation import gettext_lazy as _lazy
 
-logger = logging.getLogger(__name__)
-
+from ..cache import get_cached_subscriptions, invalidate_subscriptions
 
-class TriggerSubscriptionError(Exception):
-    pass
+logger = logging.getLogger(__name__)
 
 
 class TriggerSubscriptionQuerySet(models.QuerySet):
     def active(self) -> TriggerSubscriptionQuerySet:
-        """Filter active subscriptions."""
-        return self.filter(subscribed_at__isnull=False, unsubscribed_at__isnull=True)
+        """Filter active (subscribed, and not paused) subscriptions."""
+        return self.filter(
+            subscribed_at__isnull=False,
+            unsubscribed_at__isnull=True,
+            paused_at__isnull=True,
+        )
+
+    def record_success(self) -> int:
+        """Reset the failure count of subscriptions after a successful push."""
+        return self.update(consecutive_failures=0, last_success_at=tz_now())
+
+    def record_failure(self, pause_after: int | None = None) -> int:
+        """
+        Increment the failure count of subscriptions after a failed push.
+
+        If `pause_after` is set, any subscription that has now failed at
+        least that many times in a row is paused. Returns the number of
+        subscriptions paused.
+
+        """
+        self.update(
+            consecutive_failures=F("consecutive_failures") + 1,
+            last_failure_at=tz_now(),
+        )
+        if not pause_after:
+            return 0
+        failing = self.filter(
+            consecutive_failures__gte=pause_after, paused_at__isnull=True
+        )
+        triggers = set(failing.values_list("trigger", flat=True))
+        if paused := failing.update(paused_at=tz_now()):
+            for trigger in triggers:
+                invalidate_subscriptions(trigger)
+        return paused
 
 
 class TriggerSubscriptionManager(models.Manager):
@@ -30,18 +62,88 @@ class TriggerSubscriptionManager(models.Manager):
         zap: str,
         target_url: str,
     ) -> TriggerSubscription:
-        """Create a new subscription."""
-        try:
-            return self.create(
-                user=user,
-                trigger=trigger,
-                zap=zap,
-                target_url=target_url,
-            )
-        except IntegrityError as ex:
-            raise TriggerSubscriptionError(
-                "Error creating duplicate subscription."
-            ) from ex
+        """
+        Create a new subscription, or reactivate an existing one.
+
+        This is a single INSERT ... ON CONFLICT (user, trigger, zap) UPDATE
+        statement, so that it is atomic, and costs one round trip. A
+        reactivated subscription gets a new uuid, target_url and
+        subscribed_at, and its failure count is reset.
+
+        Django < 5.0 (and some backends) don't return the primary key of an
+        upserted row, in which case the row is read back by its unique key.
+
+        """
+        subscription = self.model(
+            user=user, trigger=trigger, zap=zap, target_url=target_url
+        )
+        self.bulk_create(
+            [subscription],
+            update_conflicts=True,
+            unique_fields=["user", "trigger", "zap"],
+            update_fields=[
+                "uuid",
+                "target_url",
+                "subscribed_at",
+                "unsubscribed_at",
+                "paused_at",
+                "consecutive_failures",
+            ],
+        )
+        invalidate_subscriptions(trigger)
+        if subscription.pk is None:
+            return self.get(user=user, trigger=trigger, zap=zap)
+        return subscription
+
+    def unsubscribe(
+        self, *, user: django_settings.AUTH_USER_MODEL, trigger: str, uuid: Any
+    ) -> bool:
+        """
+        Deactivate a user's subscription to a trigger using a single UPDATE.
+
+        Returns False if the user has no such subscription.
+
+        """
+        updated = self.filter(user=user, trigger=trigger, uuid=uuid).update(
+            unsubscribed_at=tz_now()
+        )
+        if updated:
+            invalidate_subscriptions(trigger)
+        return updated > 0
+
+    def cached_active(self, trigger: str) -> list[TriggerSubscription]:
+        """
+        Return the active subscriptions to a trigger, from the cache.
+
+        The subscriptions are cached until one of them is saved or deleted
+        (see `invalidate_subscriptions`), so this is cheap enough to call
+        on every push. Only the fields needed to push are loaded (and
+        cached), so that the cached value stays small - any other field is
+        fetched from the database when accessed.
+
+        """
+        return get_cached_subscriptions(
+            trigger,
+            "subscriptions",
+            lambda: list(
+                self.active()
+                .filter(trigger=trigger)
+                .only("id", "user", "trigger", "target_url")
+            ),
+        )
+
+    def has_subscribers(self, trigger: str) -> bool:
+        """
+        Return True if the trigger has any active subscriptions, from the cache.
+
+        Use this to skip building the data to push when nobody is listening.
+
+        """
+        return get_cached_subscriptions(
+            trigger,
+            "subscribed",
+            lambda: self.active().filter(trigger=trigger).exists(),
+        )
 
 
 class TriggerSubscription(models.Model):
@@ -54,6 +156,7 @@ class TriggerSubscription(models.Model):
 
     uuid = models.UUIDField(
         default=uuid4,
+        unique=True,
         help_text=_lazy("Public ID"),
     )
     user = models.ForeignKey(
@@ -89,6 +192,34 @@ class TriggerSubscription(models.Model):
         help_text=_lazy("Timestamp marking when the unsubscribe event occurred."),
     )
 
+    consecutive_failures = models.IntegerField(
+        default=0,
+        help_text=_lazy(
+            "The number of pushes that have failed since the last success."
+        ),
+    )
+    last_success_at = models.DateTimeField(
+        default=None,
+        null=True,
+        blank=True,
+        help_text=_lazy("Timestamp of the last successful push."),
+    )
+    last_failure_at = models.DateTimeField(
+        default=None,
+        null=True,
+        blank=True,
+        help_text=_lazy("Timestamp of the last failed push."),
+    )
+    paused_at = models.DateTimeField(
+        default=None,
+        null=True,
+        blank=True,
+        help_text=_lazy(
+            "Timestamp marking when the subscription was paused (excluded from "
+            "active subscriptions) after repeated failures."
+        ),
+    )
+
     objects = TriggerSubscriptionManager.from_queryset(TriggerSubscriptionQuerySet)()
 
     class Meta:
@@ -97,6 +228,18 @@ class TriggerSubscription(models.Model):
                 fields=["user", "trigger", "zap"], name="unique_user_zap"
             )
         ]
+        indexes = [
+            # fan-out lookups - active().filter(trigger=...)
+            models.Index(
+                fields=["trigger"],
+                condition=Q(
+                    subscribed_at__isnull=False,
+                    unsubscribed_at__isnull=True,
+                    paused_at__isnull=True,
+                ),
+                name="zapier_sub_active_trigger_idx",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"Subscription #{self.id} ('{self.trigger}')"
@@ -104,7 +247,12 @@ class TriggerSubscription(models.Model):
     @property
     def is_active(self) -> bool:
         """Return True if the subscription is active."""
-        return self.subscribed_at and not self.unsubscribed_at
+        return self.subscribed_at and not self.unsubscribed_at and not self.paused_at
+
+    @property
+    def is_paused(self) -> bool:
+        """Return True if the subscription is paused."""
+        return self.paused_at is not None
 
     @property
     def is_inactive(self) -> bool:
@@ -122,6 +270,25 @@ class TriggerSubscription(models.Model):
             "zap": self.zap,
         }
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        super().save(*args, **kwargs)
+        invalidate_subscriptions(self.trigger)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        deleted = super().delete(*args, **kwargs)
+        invalidate_subscriptions(self.trigger)
+        return deleted
+
     def unsubscribe(self) -> None:
         self.unsubscribed_at = tz_now()
         self.save(update_fields=["unsubscribed_at"])
+
+    def pause(self) -> None:
+        self.paused_at = tz_now()
+        self.save(update_fields=["paused_at"])
+
+    def resume(self) -> None:
+        """Unpause the subscription, and reset its failure count."""
+        self.paused_at = None
+        self.consecutive_failures = 0
+        self.save(update_fields=["paused_at", "consecutive_failures"])
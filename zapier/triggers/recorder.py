@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from django.db import close_old_connections
+
+from .models import TriggerEvent
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# "sync" to save events in the request, or "deferred" to save them in bulk
+RECORDING_MODE = get_setting("RECORDING_MODE")
+
+# max number of deferred events held in memory (per process)
+RECORDER_MAX_SIZE = get_setting("RECORDER_MAX_SIZE")
+
+# max number of deferred events saved per INSERT
+RECORDER_BATCH_SIZE = get_setting("RECORDER_BATCH_SIZE")
+
+# max seconds a deferred event waits before it is saved
+RECORDER_FLUSH_INTERVAL = get_setting("RECORDER_FLUSH_INTERVAL")
+
+
+class EventRecorder:
+    """
+    Buffer TriggerEvents in memory, and save them in bulk from a thread.
+
+    Events are added to a bounded queue, which is drained by a daemon
+    thread that saves them using bulk_create - in batches of up to
+    `batch_size`, at least every `flush_interval` seconds. If the queue
+    is full, the event is saved immediately (in the calling thread), so
+    that memory use is bounded and no events are dropped - unless they
+    cannot be saved at all (see `save`). Any events still in the queue
+    are saved when the process exits.
+
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float) -> None:
+        self.queue: queue.Queue[TriggerEvent] = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start the background thread (if it is not already running)."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopped.clear()
+                self.thread = threading.Thread(
+                    target=self.run, name="zapier-event-recorder", daemon=True
+                )
+                self.thread.start()
+
+    def try_record(self, event: TriggerEvent) -> bool:
+        """Add an (unsaved) event to the queue, returning False if it is full."""
+        self.start()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Event recorder queue is full, saving event immediately.")
+            return False
+        return True
+
+    def record(self, event: TriggerEvent) -> TriggerEvent:
+        """Add an (unsaved) event to the queue, or save it if the queue is full."""
+        if not self.try_record(event):
+            event.save()
+        return event
+
+    def get_batch(self, timeout: float) -> list[TriggerEvent]:
+        """Return up to batch_size events, waiting up to timeout for the first."""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def save(self, batch: list[TriggerEvent]) -> None:
+        """
+        Save a batch of events using bulk_create.
+
+        If the batch cannot be saved (e.g. one of the events is invalid)
+        the events are saved one at a time, so that only the events that
+        cannot be saved themselves are dropped (and logged).
+
+        """
+        try:
+            TriggerEvent.objects.bulk_create(batch)
+        except Exception:
+            logger.exception("Error saving %i deferred events.", len(batch))
+        else:
+            logger.debug("Saved %i deferred events.", len(batch))
+            return
+        for event in batch:
+            try:
+                event.save()
+            except Exception:
+                logger.exception("Error saving deferred event, dropping it.")
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            if batch := self.get_batch(timeout=self.flush_interval):
+                self.save(batch)
+                close_old_connections()
+
+    def flush(self) -> None:
+        """Save all of the events in the queue (in the calling thread)."""
+        while batch := self.get_batch(timeout=0):
+            self.save(batch)
+
+    def stop(self) -> None:
+        """Stop the background thread, and save any remaining events."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+_lock = threading.Lock()
+_recorder: EventRecorder | None = None
+
+
+def get_recorder() -> EventRecorder:
+    """Return the process-wide EventRecorder."""
+    global _recorder
+    if _recorder is None:
+        with _lock:
+            if _recorder is None:
+                _recorder = EventRecorder(
+                    max_size=RECORDER_MAX_SIZE,
+                    batch_size=RECORDER_BATCH_SIZE,
+                    flush_interval=RECORDER_FLUSH_INTERVAL,
+                )
+    return _recorder
+
+
+def save_event(event: TriggerEvent) -> TriggerEvent:
+    """Save the event now, or defer it, depending on RECORDING_MODE."""
+    if RECORDING_MODE == "deferred":
+        return get_recorder().record(event)
+    event.save()
+    return event
+
+
+async def asave_event(event: TriggerEvent) -> TriggerEvent:
+    """Async version of save_event (deferring an event does not block)."""
+    if RECORDING_MODE == "deferred" and get_recorder().try_record(event):
+        return event
+    await event.asave()
+    return event
+
+
+def _stop_at_exit() -> None:
+    if _recorder is not None:
+        _recorder.stop()
+
+
+def _reset_after_fork() -> None:
+    """
+    Discard the parent process recorder in a forked child.
+
+    The parent's queued events are saved by the parent - the child
+    creates its own recorder (and thread) on first use.
+
+    """
+    global _lock, _recorder
+    _lock = threading.Lock()
+    _recorder = None
+
+
+atexit.register(_stop_at_exit)
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Any
+
+from .registry import registry
+from .settings import get_setting
+from .types import PushData
+
+logger = logging.getLogger(__name__)
+
+# the recording policy for triggers that are not registered (e.g. push-only)
+RECORDING_POLICY = get_setting("RECORDING_POLICY")
+
+_lock = threading.Lock()
+_counters: dict[str, int] = defaultdict(int)
+
+
+def _is_sampled(trigger: str, rate: int) -> bool:
+    """Return True for the first, and then every `rate`-th, call for the trigger."""
+    with _lock:
+        count = _counters[trigger]
+        _counters[trigger] += 1
+    return count % rate == 0
+
+
+def get_recording_policy(trigger: str) -> str:
+    """
+    Return the recording policy to apply to the next event for a trigger.
+
+    The "sampled" policy records the full data for one in every
+    `recording_rate` events (per process), and the metadata for the rest,
+    so it is resolved here to either "full" or "metadata".
+
+    """
+    if trigger in registry:
+        policy, rate = registry[trigger].recording, registry[trigger].recording_rate
+    else:
+        policy, rate = RECORDING_POLICY, 1
+    if policy == "sampled":
+        return "full" if _is_sampled(trigger, rate) else "metadata"
+    return policy
+
+
+def get_id_field(trigger: str) -> str:
+    return registry[trigger].id_field if trigger in registry else "id"
+
+
+def get_recorded_data(trigger: str, data: PushData, policy: str) -> Any:
+    """
+    Return the event_data to record for the policy.
+
+    "full" records the data as is, "ids" records the list of object ids,
+    and "metadata" (or "none") records nothing - the event still records
+    the object count, timing and status.
+
+    """
+    if policy == "full":
+        return data
+    if policy == "ids":
+        field = get_id_field(trigger)
+        objects = data if isinstance(data, list) else [data]
+        return [obj.get(field) for obj in objects]
+    return None
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import inspect
+import logging
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Iterator
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import SAMPLE_SIZE, get_setting, get_trigger_options, import_from_path
+from .types import TriggerETagFunc, TriggerViewFunc
+
+logger = logging.getLogger(__name__)
+
+# how trigger data is recorded as TriggerEvents - the full data, the object
+# ids, the metadata only (count, timing, status), the full data for one in
+# every `recording_rate` events (else metadata), or not at all (polling only)
+RECORDING_POLICIES = ("full", "ids", "metadata", "sampled", "none")
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """A registered trigger - its view function, and its options."""
+
+    name: str
+    func: TriggerViewFunc
+    # max number of objects returned for sample requests
+    sample_size: int = SAMPLE_SIZE
+    # name of the field used as the polling high-water mark
+    cursor: str | None = None
+    # stream the data using a StreamingHttpResponse
+    stream: bool = False
+    # how polling requests are recorded - see RECORDING_POLICIES
+    recording: str = "full"
+    # record the full data for one in every `recording_rate` "sampled" events
+    recording_rate: int = 10
+    # the object field recorded by the "ids" recording policy
+    id_field: str = "id"
+    # seconds to cache the data returned to each user (None to disable)
+    cache_ttl: int | None = None
+    # function that returns a version token for the data, used as the ETag
+    etag: TriggerETagFunc | None = None
+    # share the data between concurrent identical polls
+    coalesce: bool = False
+    # max number of concurrent executions of the trigger function (all processes)
+    max_concurrency: int | None = None
+    # seconds the trigger function should take - a warning is logged if exceeded
+    time_budget: float | None = None
+
+    def __post_init__(self) -> None:
+        if not callable(self.func):
+            raise ImproperlyConfigured(f"Trigger '{self.name}' func is not callable.")
+        if self.etag is not None and not callable(self.etag):
+            raise ImproperlyConfigured(f"Trigger '{self.name}' etag is not callable.")
+        if self.recording not in RECORDING_POLICIES:
+            raise ImproperlyConfigured(
+                f"Trigger '{self.name}' recording must be one of {RECORDING_POLICIES}."
+            )
+        if self.recording_rate < 1:
+            raise ImproperlyConfigured(
+                f"Trigger '{self.name}' recording_rate must be at least 1."
+            )
+
+    @property
+    def is_async(self) -> bool:
+        """Return True if the trigger function is a coroutine function."""
+        return inspect.iscoroutinefunction(self.func)
+
+
+# options that can be set for a trigger (everything except the name and func)
+TRIGGER_OPTIONS = tuple(f.name for f in fields(Trigger))[2:]
+
+
+def _import_trigger_func(name: str, path: str) -> Callable:
+    try:
+        return import_from_path(path)
+    except (ImportError, AttributeError, ValueError) as ex:
+        raise ImproperlyConfigured(
+            f"Unable to import '{path}' for trigger '{name}'."
+        ) from ex
+
+
+class TriggerRegistry:
+    """
+    Registry of all the configured triggers.
+
+    Triggers are registered once, at startup, from the TRIGGERS setting
+    and from any functions decorated with @trigger, so that looking up a
+    trigger is a dict lookup, and misconfigured triggers fail fast.
+
+    """
+
+    def __init__(self) -> None:
+        self._triggers: dict[str, Trigger] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._triggers
+
+    def __getitem__(self, name: str) -> Trigger:
+        return self._triggers[name]
+
+    def __iter__(self) -> Iterator[Trigger]:
+        return iter(self._triggers.values())
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def register(self, name: str, func: TriggerViewFunc, **options: Any) -> Trigger:
+        """Register a trigger function, raising ImproperlyConfigured if invalid."""
+        if name in self._triggers:
+            raise ImproperlyConfigured(f"Trigger '{name}' is already registered.")
+        if invalid := set(options) - set(TRIGGER_OPTIONS):
+            raise ImproperlyConfigured(
+                f"Invalid options for trigger '{name}': {', '.join(sorted(invalid))}."
+            )
+        self._triggers[name] = Trigger(name, func, **options)
+        logger.debug("Registered trigger '%s'.", name)
+        return self._triggers[name]
+
+    def register_from_settings(self) -> None:
+        """Import and register all of the triggers in the TRIGGERS setting."""
+        for name in get_setting("TRIGGERS"):
+            options = get_trigger_options(name).copy()
+            if not (path := options.pop("func", None)):
+                raise ImproperlyConfigured(f"Missing func for trigger '{name}'.")
+            if isinstance(etag := options.get("etag"), str):
+                options["etag"] = _import_trigger_func(name, etag)
+            self.register(name, _import_trigger_func(name, path), **options)
+
+    def unregister(self, name: str) -> None:
+        del self._triggers[name]
+
+
+registry = TriggerRegistry()
+
+
+def trigger(name: str, **options: Any) -> Callable[[TriggerViewFunc], TriggerViewFunc]:
+    """
+    Register the decorated function as a trigger.
+
+    The function must be in a `triggers` module of an installed app (which
+    is imported at startup), or in a module imported by one.
+
+        @trigger("new_book", sample_size=5)
+        def new_book(request: Request) -> TriggerData:
+            ...
+
+    """
+
+    def decorator(func: TriggerViewFunc) -> TriggerViewFunc:
+        registry.register(name, func, **options)
+        return func
+
+    return decorator
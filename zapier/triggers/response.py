@@ -1,10 +1,44 @@
 from typing import Any
 
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import JsonResponse as DjangoJsonResponse
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+
+from .encoding import encode_json
 
 
 class JsonResponse(DjangoJsonResponse):
-    def __init__(self, data: list | dict, **kwargs: Any) -> None:
-        kwargs.setdefault("encoder", DjangoJSONEncoder)
-        super().__init__(data, **kwargs)
+    """
+    JSON response encoded using the configured JSON_BACKEND.
+
+    As with the Django JsonResponse, `data` must be a dict unless `safe`
+    is set to False. If an `encoder` or `json_dumps_params` is passed,
+    the data is encoded by the Django JsonResponse (using `json.dumps`)
+    instead, so that they are honoured.
+
+    """
+
+    def __init__(
+        self,
+        data: list | dict,
+        encoder: type[DjangoJSONEncoder] | None = None,
+        safe: bool = True,
+        json_dumps_params: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if encoder is not None or json_dumps_params is not None:
+            super().__init__(
+                data,
+                encoder=encoder or DjangoJSONEncoder,
+                safe=safe,
+                json_dumps_params=json_dumps_params,
+                **kwargs,
+            )
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        # skip the Django JsonResponse encoding
+        HttpResponse.__init__(self, content=encode_json(data), **kwargs)
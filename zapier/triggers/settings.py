@@ -1,11 +1,14 @@
+from __future__ import annotations
+
 import importlib
-from typing import Any, Callable, Type
+from typing import TYPE_CHECKING, Any, Callable, Type
 
 from django.conf import settings as django_settings
 from django.core.exceptions import ImproperlyConfigured
 from rest_framework.authentication import BaseAuthentication
 
-from .types import TriggerViewFunc
+if TYPE_CHECKING:
+    from .types import TriggerViewFunc
 
 # read in settings that have been overridden in django settings.py
 _settings = getattr(django_settings, "ZAPIER_TRIGGERS", {})
@@ -13,7 +16,41 @@ _settings.setdefault("AUTHENTICATOR", None)
 _settings.setdefault("STRICT_MODE", not django_settings.DEBUG)
 _settings.setdefault("TRIGGERS", {})
 _settings.setdefault("ADD_RESPONSE_HEADERS", django_settings.DEBUG)
+_settings.setdefault("JSON_BACKEND", "zapier.triggers.encoding.StdlibJSONBackend")
+_settings.setdefault("SAMPLE_SIZE", 3)
+_settings.setdefault("CACHE_ALIAS", "default")
+_settings.setdefault("COALESCE_TIMEOUT", 10)
+_settings.setdefault("COALESCE_POLL_INTERVAL", 0.05)
+_settings.setdefault("SUBSCRIPTION_CACHE_TIMEOUT", 300)
+_settings.setdefault("SUBSCRIPTION_LOCAL_TTL", 5)
+_settings.setdefault("SUBSCRIPTION_LOCAL_MAX_SIZE", 1000)
+_settings.setdefault("THROTTLE_SLOT_TIMEOUT", 60)
+_settings.setdefault("THROTTLE_RETRY_AFTER", 30)
+_settings.setdefault("RECORDING_MODE", "sync")
+_settings.setdefault("RECORDING_POLICY", "full")
+_settings.setdefault("STREAM_RECORD_MAX_BYTES", 1024 * 1024)
+_settings.setdefault("RECORDER_MAX_SIZE", 10000)
+_settings.setdefault("RECORDER_BATCH_SIZE", 500)
+_settings.setdefault("RECORDER_FLUSH_INTERVAL", 1)
+_settings.setdefault("COMPRESS_EVENT_DATA", False)
+_settings.setdefault("COMPRESSION_LEVEL", 6)
+_settings.setdefault("COMPRESSION_DICTIONARIES", {})
 _settings.setdefault("REQUESTS_TIMEOUT", 10)
+_settings.setdefault("PUSH_MAX_WORKERS", 10)
+_settings.setdefault("BULK_CREATE_BATCH_SIZE", 500)
+_settings.setdefault("HTTP_POOL_CONNECTIONS", 10)
+_settings.setdefault("HTTP_POOL_MAXSIZE", _settings["PUSH_MAX_WORKERS"])
+_settings.setdefault("PUSH_BATCH_MAX_OBJECTS", 100)
+_settings.setdefault("PUSH_BATCH_MAX_BYTES", 1024 * 1024)
+_settings.setdefault("PUSH_RETRIES", 2)
+_settings.setdefault("PUSH_RETRY_BACKOFF", 0.5)
+_settings.setdefault("PUSH_RETRY_BACKOFF_MAX", 10)
+_settings.setdefault("CIRCUIT_BREAKER_THRESHOLD", 5)
+_settings.setdefault("CIRCUIT_BREAKER_TIMEOUT", 30)
+_settings.setdefault("PAUSE_AFTER_FAILURES", None)
+_settings.setdefault("OUTBOX_BATCH_SIZE", 100)
+_settings.setdefault("OUTBOX_CLAIM_TIMEOUT", 300)
+_settings.setdefault("OUTBOX_MAX_ATTEMPTS", 5)
 
 # set to True to reject requests that don't come from Zapier
 STRICT_MODE = _settings["STRICT_MODE"]
@@ -24,6 +61,9 @@ TRIGGERS = _settings["TRIGGERS"]
 # set to True to add X-Zapier-Trigger-* response headers
 ADD_RESPONSE_HEADERS = _settings["ADD_RESPONSE_HEADERS"]
 
+# max number of objects returned for sample requests
+SAMPLE_SIZE = _settings["SAMPLE_SIZE"]
+
 
 def import_from_path(path: str) -> Type | Callable:
     """Import function from string path."""
@@ -39,17 +79,36 @@ def get_authenticator() -> BaseAuthentication:
     return import_from_path(path)
 
 
+def get_trigger_options(trigger: str) -> dict:
+    """
+    Return the options configured for the trigger.
+
+    A trigger is configured either as the path to its view function, or
+    as a dict containing the path ("func") and any other options.
+
+    """
+    try:
+        config = _settings["TRIGGERS"][trigger]
+    except KeyError:
+        raise ImproperlyConfigured("Missing trigger view function.")
+    return config if isinstance(config, dict) else {"func": config}
+
+
 def get_trigger(trigger: str) -> TriggerViewFunc:
-    """Return view data function configured for the trigger."""
+    """Return view data function registered for the trigger."""
+    from .registry import registry
+
     try:
-        return import_from_path(_settings["TRIGGERS"][trigger])
+        return registry[trigger].func
     except KeyError:
         raise ImproperlyConfigured("Missing trigger view function.")
 
 
 def trigger_exists(trigger: str) -> bool:
-    """Check that the trigger is configured."""
-    return trigger in _settings["TRIGGERS"]
+    """Check that the trigger is registered."""
+    from .registry import registry
+
+    return trigger in registry
 
 
 def get_setting(setting_name: str, default: Any = None) -> Any:
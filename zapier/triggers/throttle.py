@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from .cache import KEY_PREFIX, get_cache
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+# seconds after which a slot held by a crashed process is released
+SLOT_TIMEOUT = get_setting("THROTTLE_SLOT_TIMEOUT")
+
+THROTTLED_ERROR = "Trigger concurrency limit reached."
+
+
+class TriggerThrottled(Exception):
+    """Raised when a trigger is already running its max concurrent executions."""
+
+
+def _slot_key(trigger: str, slot: int) -> str:
+    return f"{KEY_PREFIX}:slot:{trigger}:{slot}"
+
+
+@contextmanager
+def concurrency_limit(trigger: str, max_concurrency: int) -> Iterator[None]:
+    """
+    Limit the number of concurrent executions of a trigger.
+
+    This is a semaphore shared by all processes using the Django cache -
+    each execution holds one of `max_concurrency` slot keys, which are
+    added atomically using `cache.add`, and deleted when the execution
+    ends. Slots expire after SLOT_TIMEOUT seconds, so that a slot held
+    by a process that dies is eventually released.
+
+    Raises TriggerThrottled if all of the slots are held.
+
+    """
+    cache = get_cache()
+    token = uuid.uuid4().hex
+    for slot in range(max_concurrency):
+        if cache.add(key := _slot_key(trigger, slot), token, timeout=SLOT_TIMEOUT):
+            break
+    else:
+        logger.warning("Trigger '%s' concurrency limit reached.", trigger)
+        raise TriggerThrottled(THROTTLED_ERROR)
+    try:
+        yield
+    finally:
+        # don't release the slot if it expired and has been taken by another
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+@contextmanager
+def time_budget(trigger: str, budget: float) -> Iterator[None]:
+    """Log a warning if the trigger execution takes longer than its budget."""
+    started_at = time.monotonic()
+    yield
+    if (duration := time.monotonic() - started_at) > budget:
+        logger.warning(
+            "Trigger '%s' took %.3fs, exceeding its %.3fs time budget.",
+            trigger,
+            duration,
+            budget,
+        )
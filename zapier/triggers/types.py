@@ -1,11 +1,34 @@
 # type alias for the "list" view functions
-from typing import Callable, TypeAlias
+from typing import Awaitable, Callable, Iterable, TypeAlias
 
-from django.http import HttpResponseNotFound
+from django.http import (
+    HttpResponseNotFound,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from rest_framework.request import Request
 
 from zapier.triggers.response import JsonResponse
 
 TriggerData: TypeAlias = list[dict]
-TriggerViewFunc: TypeAlias = Callable[[Request], TriggerData]
-TriggerViewMethod: TypeAlias = Callable[..., JsonResponse | HttpResponseNotFound]
+# data pushed to a webhook - a single object, or a batch of objects
+PushData: TypeAlias = dict | TriggerData
+# push data, or a callable / lazy iterable (e.g. QuerySet) that produces it
+LazyPushData: TypeAlias = (
+    PushData | Iterable[dict] | Callable[[], PushData | Iterable[dict]]
+)
+# view functions can return a list, or a lazy iterable (e.g. QuerySet) of dicts
+SyncTriggerViewFunc: TypeAlias = Callable[[Request], TriggerData | Iterable[dict]]
+AsyncTriggerViewFunc: TypeAlias = Callable[
+    [Request], Awaitable[TriggerData | Iterable[dict]]
+]
+TriggerViewFunc: TypeAlias = SyncTriggerViewFunc | AsyncTriggerViewFunc
+# functions that return a version token for the trigger data (or None)
+TriggerETagFunc: TypeAlias = Callable[[Request], str | None]
+TriggerViewMethod: TypeAlias = Callable[
+    ...,
+    JsonResponse
+    | StreamingHttpResponse
+    | HttpResponseNotFound
+    | HttpResponseNotModified,
+]
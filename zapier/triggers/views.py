@@ -1,13 +1,23 @@
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
-from functools import wraps
-from typing import Any
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial, wraps
+from itertools import islice
+from typing import Any, Iterable, Iterator, cast
 from uuid import UUID
 
-from django.http import HttpResponseNotFound
-from django.shortcuts import get_object_or_404
+from asgiref.sync import async_to_sync
+from django.db.models import QuerySet
+from django.http import (
+    Http404,
+    HttpResponseNotFound,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import parse_etags, quote_etag
 from django.utils.timezone import now as tz_now
 from rest_framework.decorators import (
     api_view,
@@ -19,21 +29,38 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import TriggerEvent, TriggerSubscription
+from .cache import get_cache_key, get_cached_data, set_cached_data
+from .coalesce import single_flight
+from .encoding import decode_json, encode_json
+from .fields import RawJSON
+from .models import TriggerCursor, TriggerEvent, TriggerSubscription
 from .permissions import IsZapier
+from .recorder import save_event
+from .recording import get_id_field, get_recorded_data, get_recording_policy
+from .registry import registry
 from .response import JsonResponse
-from .settings import (
-    ADD_RESPONSE_HEADERS,
-    get_authenticator,
-    get_trigger,
-    trigger_exists,
+from .settings import ADD_RESPONSE_HEADERS, get_authenticator, get_setting
+from .throttle import TriggerThrottled, concurrency_limit, time_budget
+from .types import (
+    AsyncTriggerViewFunc,
+    SyncTriggerViewFunc,
+    TriggerData,
+    TriggerViewMethod,
 )
-from .types import TriggerData, TriggerViewMethod
 
 logger = logging.getLogger(__name__)
 
 AUTHENTICATOR = get_authenticator()
 
+# seconds after which Zapier should retry a throttled request
+THROTTLE_RETRY_AFTER = get_setting("THROTTLE_RETRY_AFTER")
+
+# size (in bytes) of the chunks sent by streaming responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# max size (in bytes) of the full data recorded for a streamed poll
+STREAM_RECORD_MAX_BYTES = get_setting("STREAM_RECORD_MAX_BYTES")
+
 
 @api_view(["GET"])
 @authentication_classes([AUTHENTICATOR])
@@ -44,20 +71,116 @@ def auth_check(request: Request) -> Response:
     return JsonResponse({"connectionLabel": request.user.username}, status=200)
 
 
+def limit_data(data: Iterable[dict], limit: int | None) -> TriggerData:
+    """Evaluate trigger data as a list, fetching at most `limit` objects."""
+    if limit is None:
+        return list(data)
+    if isinstance(data, (list, tuple, QuerySet)):
+        return list(data[:limit])
+    return list(islice(data, limit))
+
+
+def make_etag(content: bytes) -> str:
+    """Return a (quoted) ETag fingerprint of the content."""
+    return quote_etag(hashlib.blake2b(content, digest_size=16).hexdigest())
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Return True if the etag matches the If-None-Match header value."""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
+
+
 def trigger_method(view_method: TriggerViewMethod) -> TriggerViewMethod:
     """Return 404 if trigger passed to view method does not exist."""
 
     @wraps(view_method)
     def decorated(
         view: TriggerView, request: Request, trigger: str, *args: Any, **kwargs: Any
-    ) -> JsonResponse | HttpResponseNotFound:
-        if trigger_exists(trigger):
+    ) -> (
+        JsonResponse
+        | StreamingHttpResponse
+        | HttpResponseNotFound
+        | HttpResponseNotModified
+    ):
+        if trigger in registry:
             return view_method(view, request, trigger, *args, **kwargs)
         return HttpResponseNotFound("Trigger does not exist.")
 
     return decorated
 
 
+class StreamedData:
+    """
+    The data recorded for a streamed poll, built up as it is streamed.
+
+    The "full" policy keeps the encoded objects in a single buffer (as
+    the JSON array that is recorded), so the recorded data is held in
+    memory once - plus one copy as it is saved. If the buffer grows past
+    `max_bytes` it is discarded, and the object ids are recorded instead
+    (the "ids" policy), so memory use is bounded however large the
+    stream is.
+
+    """
+
+    def __init__(self, policy: str, id_field: str, max_bytes: int) -> None:
+        self.policy = policy
+        self.id_field = id_field
+        self.max_bytes = max_bytes
+        self.buffer = bytearray(b"[")
+        self.ids: list[Any] = []
+
+    def add(self, obj: dict, chunk: bytes) -> None:
+        if self.policy not in ("full", "ids"):
+            return
+        self.ids.append(obj.get(self.id_field))
+        if self.policy != "full":
+            return
+        if len(self.buffer) + len(chunk) > self.max_bytes:
+            logger.debug("Streamed data too large to record, recording ids.")
+            self.policy = "ids"
+            self.buffer = bytearray()
+            return
+        if len(self.buffer) > 1:
+            self.buffer += b", "
+        self.buffer += chunk
+
+    def get_event_data(self) -> Any:
+        if self.policy == "full":
+            self.buffer += b"]"
+            return RawJSON(self.buffer.decode())
+        if self.policy == "ids":
+            return self.ids
+        return None
+
+
+class StreamingContent:
+    """
+    Streaming response content that exits `limits` when it is closed.
+
+    Django closes the streaming content when the response is closed, but
+    closing a generator that was never started runs none of its code, so
+    the trigger's execution limits are exited here as well.
+
+    """
+
+    def __init__(self, iterator: Iterator[bytes], limits: ExitStack) -> None:
+        self.iterator = iterator
+        self.limits = limits
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iterator
+
+    def close(self) -> None:
+        try:
+            if close := getattr(self.iterator, "close", None):
+                close()
+        finally:
+            self.limits.close()
+
+
 class TriggerView(APIView):
     """
     Manage Zapier REST Hook subscriptions and route polling requests.
@@ -93,55 +216,391 @@ class TriggerView(APIView):
         """Return True if the request is a sample data request."""
         return request.query_params.get("sample", "").lower() == "true"
 
+    def is_recorded_request(self, request: Request, trigger: str) -> bool:
+        """Return True if the request should be recorded as a TriggerEvent."""
+        if self.is_sample_request(request):
+            return False
+        return registry[trigger].recording != "none"
+
+    def get_limit(self, request: Request, trigger: str) -> int | None:
+        """
+        Return the max number of objects to return (None for no limit).
+
+        For sample requests we only return `sample_size` objects to Zapier
+        (three, by default) as that is all that the UI requires.
+
+        """
+        if self.is_sample_request(request):
+            return registry[trigger].sample_size
+        return None
+
+    def get_cursor_field(self, request: Request, trigger: str) -> str | None:
+        """
+        Return the cursor field configured for the trigger.
+
+        Sample requests never use the cursor, as they must always return
+        data for the Zap builder UI.
+
+        """
+        if self.is_sample_request(request):
+            return None
+        return registry[trigger].cursor
+
+    def set_cursor(self, request: Request, trigger: str) -> None:
+        """
+        Set the current cursor value as `request.trigger_cursor`.
+
+        Trigger functions can use this to return only the objects that
+        are newer than the last poll (it is None if there is no cursor).
+
+        """
+        request.trigger_cursor = None
+        if self.get_cursor_field(request, trigger):
+            request.trigger_cursor = TriggerCursor.objects.get_value(
+                request.user, trigger
+            )
+
+    def get_cursor_value(
+        self, request: Request, trigger: str, data: TriggerData
+    ) -> Any:
+        """Return the highest cursor value in the data (None if there isn't one)."""
+        if not (field := self.get_cursor_field(request, trigger)):
+            return None
+        values = [obj[field] for obj in data if obj.get(field) is not None]
+        return max(values) if values else None
+
+    def advance_cursor(self, request: Request, trigger: str, data: TriggerData) -> None:
+        """Advance the cursor to the highest value returned."""
+        if (value := self.get_cursor_value(request, trigger, data)) is not None:
+            TriggerCursor.objects.advance(request.user, trigger, value)
+
+    def call_trigger_func(self, request: Request, trigger: str) -> Iterable[dict]:
+        """Call the trigger function (async functions are run in an event loop)."""
+        func = registry[trigger].func
+        if registry[trigger].is_async:
+            return async_to_sync(cast(AsyncTriggerViewFunc, func))(request)
+        return cast(SyncTriggerViewFunc, func)(request)
+
+    def get_trigger_key(self, request: Request, trigger: str) -> str:
+        """Return the key used to cache and coalesce the trigger data."""
+        return get_cache_key(
+            trigger,
+            request.user,
+            sample=self.is_sample_request(request),
+            cursor=request.trigger_cursor,
+        )
+
+    def prepare_request(self, request: Request, trigger: str) -> None:
+        """
+        Set the trigger attributes passed to the trigger function.
+
+        The max number of objects to return is set as `request.trigger_limit`
+        (None if there is no limit), and the function can use this to avoid
+        fetching objects that will not be returned.
+
+        If the trigger is configured with a cursor, the function can use
+        `request.trigger_cursor` to filter out objects already returned.
+
+        """
+        request.trigger_limit = self.get_limit(request, trigger)
+        self.set_cursor(request, trigger)
+
     def get_trigger_data(self, request: Request, trigger: str) -> TriggerData:
         """
         Call the configured trigger view function.
 
-        For sample requests we only return three objects max to Zapier
-        as that is all that the UI requires.
+        The request must have been passed to `prepare_request` first. The
+        function may return a lazy QuerySet (of dicts, e.g. using `values()`)
+        or any other iterable, which is sliced to `request.trigger_limit`
+        before it is evaluated. If the trigger is configured with a cursor,
+        the cursor is advanced to the highest value in the data.
+
+        If the trigger is configured with a `cache_ttl` the data is cached
+        per user (and cursor), and `request.trigger_cache_hit` is set to
+        True if the data came from the cache. If the trigger is configured
+        to `coalesce`, concurrent identical requests share the data fetched
+        by the first of them.
 
         """
-        data = get_trigger(trigger)(request)
-        if self.is_sample_request(request):
-            return data[:3]
+        request.trigger_cache_hit = False
+        options = registry[trigger]
+        if not (options.cache_ttl or options.coalesce):
+            return self.fetch_trigger_data(request, trigger)
+        key = self.get_trigger_key(request, trigger)
+        if options.cache_ttl and (data := get_cached_data(key)) is not None:
+            request.trigger_cache_hit = True
+            return data
+        if options.coalesce:
+            data = single_flight(
+                key, partial(self.fetch_trigger_data, request, trigger)
+            )
+        else:
+            data = self.fetch_trigger_data(request, trigger)
+        if options.cache_ttl:
+            set_cached_data(key, data, options.cache_ttl)
         return data
 
-    @trigger_method
-    def get(self, request: Request, trigger: str) -> JsonResponse:
+    def enter_execution_limits(self, stack: ExitStack, trigger: str) -> None:
         """
-        Fetch trigger data.
+        Enter the trigger's `max_concurrency` and `time_budget` contexts.
 
-        Every trigger must have a func configured that will return data
-        as the "list" function. For polling triggers this should be the
-        real polling trigger data; for resthook triggers this can be
-        some static sample data - it is only used for the Zap UI.
+        Raises TriggerThrottled if the trigger is already running its max
+        number of concurrent calls.
+
+        """
+        options = registry[trigger]
+        if options.max_concurrency:
+            stack.enter_context(concurrency_limit(trigger, options.max_concurrency))
+        if options.time_budget:
+            stack.enter_context(time_budget(trigger, options.time_budget))
+
+    def fetch_trigger_data(self, request: Request, trigger: str) -> TriggerData:
+        """
+        Call the trigger function, and advance the cursor.
+
+        Raises TriggerThrottled if the trigger is configured with a
+        `max_concurrency`, and that many calls are already running.
+
+        """
+        with ExitStack() as stack:
+            self.enter_execution_limits(stack, trigger)
+            data = limit_data(
+                self.call_trigger_func(request, trigger), request.trigger_limit
+            )
+        self.advance_cursor(request, trigger, data)
+        return data
+
+    def get_throttled_response(
+        self, request: Request, trigger: str, started_at: datetime, error: str
+    ) -> JsonResponse:
+        """Record the throttled request, and return a 429 that Zapier will retry."""
+        if self.is_recorded_request(request, trigger):
+            save_event(
+                TriggerEvent(
+                    user=request.user,
+                    trigger=trigger,
+                    http_method="GET",
+                    started_at=started_at,
+                    finished_at=tz_now(),
+                    status_code=429,
+                    error=error,
+                )
+            )
+        return JsonResponse(
+            {"error": error},
+            status=429,
+            headers={"Retry-After": str(THROTTLE_RETRY_AFTER)},
+        )
+
+    def is_streaming_request(self, request: Request, trigger: str) -> bool:
+        """Return True if the trigger is configured to stream its data."""
+        if self.is_sample_request(request):
+            return False
+        return registry[trigger].stream
+
+    def stream_trigger_data(
+        self, request: Request, trigger: str
+    ) -> StreamingHttpResponse | JsonResponse:
+        """
+        Call the configured trigger view function, and stream the data.
+
+        The function can return a generator, or a QuerySet - which is read
+        using `iterator()` so that the results are not cached - and each
+        object is encoded and sent as it is read.
+
+        The trigger's execution limits (see `enter_execution_limits`) are
+        entered before the function is called, and exited once the stream
+        has been sent (or abandoned), as the data is read while streaming.
 
         """
-        logger.debug("Fetching data for '%s' trigger.", trigger)
         started_at = tz_now()
-        event_data = self.get_trigger_data(request, trigger)
-        headers = {}
-        # we only record if data exists, and is _not_ a sample request
-        if event_data and not self.is_sample_request(request):
-            event = TriggerEvent.objects.create(
+        request.trigger_limit = None
+        self.set_cursor(request, trigger)
+        limits = ExitStack()
+        try:
+            self.enter_execution_limits(limits, trigger)
+            data = self.call_trigger_func(request, trigger)
+        except TriggerThrottled as ex:
+            return self.get_throttled_response(request, trigger, started_at, str(ex))
+        except BaseException:
+            limits.close()
+            raise
+        if isinstance(data, QuerySet):
+            data = data.iterator()
+        return StreamingHttpResponse(
+            StreamingContent(
+                self.iter_json(request, trigger, data, started_at, limits), limits
+            ),
+            content_type="application/json",
+        )
+
+    def iter_json(
+        self,
+        request: Request,
+        trigger: str,
+        data: Iterable[dict],
+        started_at: datetime,
+        limits: ExitStack | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Encode trigger data as a JSON array, in chunks of STREAM_CHUNK_SIZE.
+
+        The cursor and event are updated once the stream is finished. The
+        event data is built up from the encoded objects as they are sent
+        (see StreamedData), so the objects themselves are never held in
+        memory as a list.
+
+        """
+        cursor_field = self.get_cursor_field(request, trigger)
+        cursor = None
+        recorded = self.is_recorded_request(request, trigger)
+        streamed = StreamedData(
+            policy=get_recording_policy(trigger) if recorded else "none",
+            id_field=get_id_field(trigger),
+            max_bytes=STREAM_RECORD_MAX_BYTES,
+        )
+        count = 0
+        buffer = bytearray(b"[")
+        # the limits are exited when the stream ends, or is closed early
+        with limits or ExitStack():
+            for obj in data:
+                chunk = encode_json(obj)
+                if count:
+                    buffer += b", "
+                buffer += chunk
+                count += 1
+                streamed.add(obj, chunk)
+                if cursor_field and (value := obj.get(cursor_field)) is not None:
+                    cursor = value if cursor is None else max(cursor, value)
+                if len(buffer) >= STREAM_CHUNK_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+            buffer += b"]"
+            yield bytes(buffer)
+        if cursor is not None:
+            TriggerCursor.objects.advance(request.user, trigger, cursor)
+        if count and recorded:
+            self.record_streamed_data(request, trigger, streamed, count, started_at)
+
+    def record_streamed_data(
+        self,
+        request: Request,
+        trigger: str,
+        streamed: StreamedData,
+        count: int,
+        started_at: datetime,
+    ) -> TriggerEvent:
+        """Record the streamed data as a TriggerEvent (see iter_json)."""
+        return save_event(
+            TriggerEvent(
                 user=request.user,
                 trigger=trigger,
-                event_data=event_data,
+                event_data=streamed.get_event_data(),
+                object_count=count,
+                http_method="GET",
+                started_at=started_at,
+                finished_at=tz_now(),
+                status_code=200,
+            )
+        )
+
+    def get_version_etag(self, request: Request, trigger: str) -> str | None:
+        """
+        Return the ETag from the trigger version token (None if there isn't one).
+
+        The token returned by the trigger's `etag` function (e.g. the max
+        `updated_at` of the data) is combined with everything else that
+        changes the response - the cursor, and the limit - so that the ETag
+        can be checked without calling the trigger function at all.
+
+        """
+        if not (func := registry[trigger].etag):
+            return None
+        if (token := func(request)) is None:
+            return None
+        return make_etag(
+            encode_json([token, request.trigger_cursor, request.trigger_limit])
+        )
+
+    def record_trigger_data(
+        self,
+        request: Request,
+        trigger: str,
+        event_data: TriggerData,
+        started_at: datetime,
+    ) -> TriggerEvent | None:
+        """Record the data returned as a TriggerEvent (if it should be recorded)."""
+        # we only record if data exists, and is _not_ a sample request - data
+        # served from the cache has already been recorded.
+        if not event_data or request.trigger_cache_hit:
+            return None
+        if not self.is_recorded_request(request, trigger):
+            return None
+        policy = get_recording_policy(trigger)
+        return save_event(
+            TriggerEvent(
+                user=request.user,
+                trigger=trigger,
+                event_data=get_recorded_data(trigger, event_data, policy),
                 object_count=len(event_data),
                 http_method="GET",
                 started_at=started_at,
                 finished_at=tz_now(),
                 status_code=200,
             )
-            if ADD_RESPONSE_HEADERS:
-                headers["X-Api-Trigger-Count"] = len(event_data)
-                headers["X-Api-Trigger-Event"] = event.uuid
+        )
 
-        return JsonResponse(data=event_data, status=200, safe=False, headers=headers)
+    @trigger_method
+    def get(
+        self, request: Request, trigger: str
+    ) -> JsonResponse | StreamingHttpResponse | HttpResponseNotModified:
+        """
+        Fetch trigger data.
+
+        Every trigger must have a func configured that will return data
+        as the "list" function. For polling triggers this should be the
+        real polling trigger data; for resthook triggers this can be
+        some static sample data - it is only used for the Zap UI.
+
+        Responses include an ETag - from the trigger's `etag` function if
+        it has one, else from the response content - and if this matches
+        the If-None-Match request header a 304 is returned (and the request
+        is not recorded, as the data has not changed).
+
+        """
+        logger.debug("Fetching data for '%s' trigger.", trigger)
+        if self.is_streaming_request(request, trigger):
+            return self.stream_trigger_data(request, trigger)
+        started_at = tz_now()
+        self.prepare_request(request, trigger)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag := self.get_version_etag(request, trigger):
+            if etag_matches(etag, if_none_match):
+                return HttpResponseNotModified(headers={"ETag": etag})
+        try:
+            event_data = self.get_trigger_data(request, trigger)
+        except TriggerThrottled as ex:
+            return self.get_throttled_response(request, trigger, started_at, str(ex))
+        response = JsonResponse(data=event_data, status=200, safe=False)
+        etag = etag or make_etag(response.content)
+        if etag_matches(etag, if_none_match):
+            return HttpResponseNotModified(headers={"ETag": etag})
+        response["ETag"] = etag
+        if ADD_RESPONSE_HEADERS and registry[trigger].cache_ttl:
+            response["X-Api-Trigger-Cache"] = (
+                "hit" if request.trigger_cache_hit else "miss"
+            )
+        event = self.record_trigger_data(request, trigger, event_data, started_at)
+        if event and ADD_RESPONSE_HEADERS:
+            response["X-Api-Trigger-Count"] = len(event_data)
+            response["X-Api-Trigger-Event"] = event.uuid
+        return response
 
     def get_request_body(self, request: Request) -> dict:
-        """Decode incoming request body and return as a dict."""
-        return json.loads(request.body.decode())
+        """Decode incoming request body (once) and return as a dict."""
+        if not hasattr(request, "trigger_request_body"):
+            request.trigger_request_body = decode_json(request.body)
+        return request.trigger_request_body
 
     def get_target_url(self, request: Request) -> str:
         """Extract hookUrl from incoming request body."""
@@ -168,6 +627,8 @@ class TriggerView(APIView):
         self, request: Request, trigger: str, subscription_id: UUID
     ) -> JsonResponse:
         """Deactivate an existing webhook subscription."""
-        subscription = get_object_or_404(TriggerSubscription, uuid=subscription_id)
-        subscription.unsubscribe()
+        if not TriggerSubscription.objects.unsubscribe(
+            user=request.user, trigger=trigger, uuid=subscription_id
+        ):
+            raise Http404("Subscription does not exist.")
         return JsonResponse({}, status=204)